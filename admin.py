@@ -0,0 +1,28 @@
+import functools
+import hmac
+from flask import current_app, request, jsonify
+
+
+def is_admin_request():
+    """Check the X-Admin-Token header against the configured ADMIN_TOKEN"""
+    expected = current_app.config.get('ADMIN_TOKEN')
+    provided = request.headers.get('X-Admin-Token', '')
+    return bool(expected) and hmac.compare_digest(provided, expected)
+
+
+def admin_required(view):
+    """Restrict a route to requests carrying the admin token"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('ADMIN_TOKEN'):
+            return jsonify({
+                'success': False,
+                'error': 'Admin endpoints are disabled (ADMIN_TOKEN not set)'
+            }), 403
+        if not is_admin_request():
+            return jsonify({
+                'success': False,
+                'error': 'Invalid admin token'
+            }), 401
+        return view(*args, **kwargs)
+    return wrapper
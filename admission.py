@@ -0,0 +1,126 @@
+import threading
+import time
+from flask import g, request, jsonify
+import deadlines
+from metrics import metrics
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded wait queue for upstream-bound routes.
+
+    At most ``max_concurrent`` requests to ``ADMISSION_ROUTES`` run at once
+    in a worker process; up to ``max_queue`` more wait for a slot for at
+    most ``queue_timeout`` seconds. Anything beyond that is shed straight
+    away with ``503`` and ``Retry-After``, so a slow Wikipedia can't tie up
+    every worker thread and cache-only routes keep being served. That only
+    holds while ``max_concurrent + max_queue`` is below the worker's thread
+    count (``ADMISSION_WORKER_THREADS``), which ``init_app`` checks.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.max_concurrent = 2
+        self.max_queue = 4
+        self.worker_threads = None
+        self.queue_timeout = 2.0
+        self.retry_after = 5
+        self.routes = set()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('ADMISSION_ENABLED', True)
+        self.max_concurrent = app.config.get('ADMISSION_MAX_CONCURRENT', self.max_concurrent)
+        self.max_queue = app.config.get('ADMISSION_MAX_QUEUE', self.max_queue)
+        self.queue_timeout = app.config.get('ADMISSION_QUEUE_TIMEOUT', self.queue_timeout)
+        self.retry_after = app.config.get('ADMISSION_RETRY_AFTER', self.retry_after)
+        self.routes = set(app.config.get('ADMISSION_ROUTES', []))
+        self.worker_threads = app.config.get('ADMISSION_WORKER_THREADS')
+        app.extensions['admission'] = self
+        if not self.enabled:
+            return
+        if self.worker_threads and self.max_concurrent + self.max_queue >= self.worker_threads:
+            raise ValueError(
+                f'ADMISSION_MAX_CONCURRENT + ADMISSION_MAX_QUEUE '
+                f'({self.max_concurrent} + {self.max_queue}) must be less than the '
+                f'{self.worker_threads} worker threads (GUNICORN_THREADS), or upstream '
+                f'requests can hold every thread and stall cache-only routes'
+            )
+
+        @app.before_request
+        def _admit_request():
+            route = request.endpoint
+            if route not in self.routes:
+                return None
+            if not self.acquire(route):
+                response = jsonify({
+                    'success': False,
+                    'error': 'Server is busy fetching from Wikipedia, please retry shortly'
+                })
+                response.status_code = 503
+                response.headers['Retry-After'] = str(self.retry_after)
+                return response
+            g.admission_slot = True
+            return None
+
+        @app.teardown_request
+        def _release_slot(exc=None):
+            if g.pop('admission_slot', False):
+                self.release()
+
+    def acquire(self, route):
+        """Take a slot, waiting in the queue if there is room; False when shed"""
+        start = time.perf_counter()
+        timeout = self.queue_timeout
+        deadline = deadlines.current()
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        with self._cond:
+            if self.active >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    return self._reject(route, 'queue_full')
+                self.waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self.active < self.max_concurrent,
+                                                   timeout=timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    return self._reject(route, 'queue_timeout')
+            self.active += 1
+            self.admitted += 1
+        metrics.observe('admission_wait_seconds', time.perf_counter() - start, route=route)
+        return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def _reject(self, route, reason):
+        # Called with the condition held
+        self.rejected += 1
+        metrics.inc('admission_rejected_total', route=route, reason=reason)
+        return False
+
+    def stats(self):
+        """Current saturation of this worker's upstream slots"""
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'active': self.active,
+                'max_concurrent': self.max_concurrent,
+                'waiting': self.waiting,
+                'max_queue': self.max_queue,
+                'worker_threads': self.worker_threads,
+                'saturation': round(self.active / self.max_concurrent, 3) if self.max_concurrent else 0.0,
+                'queue_full': self.waiting >= self.max_queue,
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
+
+
+admission = AdmissionController()
@@ -1,12 +1,42 @@
 import os
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
 from config import config
-from database import db, init_db, seed_db
+from database import db, init_db, seed_db, compress_legacy_rows, Topic, Content, WikipediaContent, WikipediaSection, WikipediaAlias
 from content_manager import ContentManager
 from wikipedia_manager import WikipediaManager
 from file_generator import FileGenerator
+from response_cache import response_cache
+from metrics import metrics
+import server_timing
+import deadlines
+from profiling import request_profiler
+from slow_query_log import slow_query_log
+from memory_profiling import memory_monitor
+from admission import admission
+from response_compression import response_compressor
+from title_index import title_index
+from related_index import related_index
+from vector_search import vector_index
+from circuit_breaker import upstream_breaker
+from admin import admin_required
+from serialization import FastJSONProvider, parse_fields
 from datetime import datetime
 
+def setup_database(app):
+    """Create tables, apply column migrations and seed sample data"""
+    with app.app_context():
+        init_db(app)
+        seed_db(app)
+
+def warm_indexes(app):
+    """Load cached articles into the in-process indexes before the first request needs them"""
+    with app.app_context():
+        if related_index.enabled:
+            related_index.refresh()
+        if title_index.enabled:
+            title_index.refresh()
+        vector_index.refresh()
+
 def create_app(config_name='development'):
     """Application factory"""
     app = Flask(__name__)
@@ -14,12 +44,51 @@ def create_app(config_name='development'):
     # Load configuration
     app.config.from_object(config[config_name])
 
+    app.json = FastJSONProvider(app)
+    app.json.fast = app.config.get('JSON_FAST_ENCODER', True)
+
     # Initialize database
     db.init_app(app)
+    response_cache.init_app(app)
+    metrics.init_app(app)
+    server_timing.init_app(app)
+    request_profiler.init_app(app)
+    slow_query_log.init_app(app)
+    memory_monitor.init_app(app)
+    deadlines.init_app(app)
+    admission.init_app(app)
+    upstream_breaker.init_app(app)
+    response_compressor.init_app(app)
+    title_index.init_app(app)
+    related_index.init_app(app)
+    vector_index.init_app(app)
 
-    with app.app_context():
-        init_db(app)
-        seed_db(app)
+    if app.config.get('INIT_DB_ON_STARTUP', True):
+        setup_database(app)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the schema and seed data (run once per deployment)"""
+        setup_database(app)
+        print('Database initialized.')
+
+    @app.cli.command('compress-legacy-rows')
+    def compress_legacy_rows_command():
+        """Compress article text stored before compression was added (one-off migration)"""
+        db.create_all()
+        if compress_legacy_rows():
+            print('Legacy rows compressed.')
+        else:
+            print('Legacy rows were already compressed.')
+
+    @app.cli.command('build-vector-index')
+    def build_vector_index_command():
+        """Add every cached article to the vector search index (optional warm-up before starting workers)"""
+        if not vector_index.available:
+            print('Vector search is disabled or numpy is not installed.')
+            return
+        vector_index.refresh()
+        print(f'Vector index holds {vector_index.rows} rows.')
 
     # Initialize file generator
     file_gen = FileGenerator(app.config['DOWNLOAD_FOLDER'])
@@ -33,6 +102,27 @@ def create_app(config_name='development'):
     def internal_error(error):
         return jsonify({'error': 'Internal server error'}), 500
 
+    def fields_arg(allowed):
+        """Sparse fieldset from the fields= parameter (or a POST's JSON body); None means all fields.
+
+        GET responses are cached by URL, so a GET only honours the query
+        parameter; a fieldset in its body would otherwise end up cached
+        for every later request to the same URL.
+        """
+        value = request.args.get('fields')
+        if value is None and request.method == 'POST' and request.is_json:
+            body = request.get_json(silent=True)
+            if isinstance(body, dict):
+                value = body.get('fields')
+        return parse_fields(value, allowed)
+
+    def wants_ndjson():
+        """Whether the client asked for a streamed NDJSON listing (stream=1 or Accept)"""
+        if request.args.get('stream') in ('1', 'true'):
+            return True
+        best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+        return best == 'application/x-ndjson'
+
     # ====== WEB ROUTES ======
     @app.route('/')
     def index():
@@ -63,11 +153,22 @@ def create_app(config_name='development'):
     @app.route('/api/topics', methods=['GET'])
     def api_topics():
         """Get all available topics"""
-        topics = ContentManager.get_all_topics()
-        return jsonify({
-            'success': True,
-            'data': [topic.to_dict() for topic in topics]
-        })
+        try:
+            fields = fields_arg(Topic.FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        def build():
+            topics = ContentManager.get_all_topics()
+            return {
+                'success': True,
+                'data': [topic.to_dict(fields) for topic in topics]
+            }, 200
+
+        return response_cache.cached_json('api_topics', [Topic], build)
 
     @app.route('/api/topics/search', methods=['GET'])
     def api_search():
@@ -80,69 +181,114 @@ def create_app(config_name='development'):
                 'error': 'Query parameter required'
             }), 400
 
+        try:
+            fields = fields_arg(Topic.FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
         if len(query) < 2:
             return jsonify({
                 'success': False,
                 'error': 'Query must be at least 2 characters long'
             }), 400
 
-        results = ContentManager.search_topics(query)
-        return jsonify({
-            'success': True,
-            'data': [topic.to_dict() for topic in results]
-        })
+        def build():
+            results = ContentManager.search_topics(query)
+            return {
+                'success': True,
+                'data': [topic.to_dict(fields) for topic in results]
+            }, 200
+
+        return response_cache.cached_json('api_search', [Topic], build)
 
     @app.route('/api/topics/<int:topic_id>', methods=['GET'])
     def api_topic_detail(topic_id):
         """Get a specific topic"""
-        topic = ContentManager.get_topic_by_id(topic_id)
-
-        if not topic:
+        try:
+            fields = fields_arg(Topic.FIELDS)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'Topic not found'
-            }), 404
+                'error': str(e)
+            }), 400
 
-        return jsonify({
-            'success': True,
-            'data': topic.to_dict()
-        })
+        def build():
+            topic = ContentManager.get_topic_by_id(topic_id)
+
+            if not topic:
+                return {
+                    'success': False,
+                    'error': 'Topic not found'
+                }, 404
+
+            return {
+                'success': True,
+                'data': topic.to_dict(fields)
+            }, 200
+
+        return response_cache.cached_json('api_topic_detail', [Topic], build)
 
     @app.route('/api/topics/<int:topic_id>/content', methods=['GET'])
     def api_topic_content(topic_id):
-        """Get all content for a specific topic"""
-        topic = ContentManager.get_topic_by_id(topic_id)
-
-        if not topic:
+        """Get all content for a specific topic (fields= selects content fields)"""
+        try:
+            fields = fields_arg(Content.FIELDS)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'Topic not found'
-            }), 404
+                'error': str(e)
+            }), 400
 
-        content_list = ContentManager.get_content_by_topic_id(topic_id)
-        return jsonify({
-            'success': True,
-            'topic': topic.to_dict(),
-            'content': [c.to_dict() for c in content_list]
-        })
+        def build():
+            topic = ContentManager.get_topic_by_id(topic_id)
+
+            if not topic:
+                return {
+                    'success': False,
+                    'error': 'Topic not found'
+                }, 404
+
+            content_list = ContentManager.get_content_by_topic_id(topic_id, fields)
+            return {
+                'success': True,
+                'topic': topic.to_dict(),
+                'content': [c.to_dict(fields) for c in content_list]
+            }, 200
+
+        return response_cache.cached_json('api_topic_content', [Topic, Content], build)
 
     @app.route('/api/content/<int:content_id>', methods=['GET'])
     def api_content_detail(content_id):
-        """Get specific content details"""
-        content = ContentManager.get_content_by_id(content_id)
-
-        if not content:
+        """Get specific content details (fields= selects content fields)"""
+        try:
+            fields = fields_arg(Content.FIELDS)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'Content not found'
-            }), 404
+                'error': str(e)
+            }), 400
 
-        topic = ContentManager.get_topic_by_id(content.topic_id)
-        return jsonify({
-            'success': True,
-            'topic': topic.to_dict(),
-            'content': content.to_dict()
-        })
+        def build():
+            load = None if fields is None else fields | {'topic_id'}
+            content = ContentManager.get_content_by_id(content_id, load)
+
+            if not content:
+                return {
+                    'success': False,
+                    'error': 'Content not found'
+                }, 404
+
+            topic = ContentManager.get_topic_by_id(content.topic_id)
+            return {
+                'success': True,
+                'topic': topic.to_dict(),
+                'content': content.to_dict(fields)
+            }, 200
+
+        return response_cache.cached_json('api_content_detail', [Topic, Content], build)
 
     @app.route('/api/download/<int:content_id>', methods=['POST'])
     def api_download(content_id):
@@ -200,17 +346,62 @@ def create_app(config_name='development'):
             }), 500
 
     # Initialize Wikipedia Manager
-    wiki_manager = WikipediaManager()
+    wiki_manager = WikipediaManager(
+        api_url=app.config.get('WIKIPEDIA_API_URL'),
+        timeout=app.config.get('WIKIPEDIA_TIMEOUT', 10.0),
+        transport=app.config.get('WIKIPEDIA_TRANSPORT', 'live'),
+        cassette=app.config.get('WIKIPEDIA_CASSETTE'),
+        breaker=upstream_breaker,
+        persist_links=app.config.get('PERSIST_LINK_GRAPH', False)
+    )
+
+    def upstream_unavailable(result):
+        """503 for a result refused by the open circuit breaker"""
+        response = jsonify(result)
+        response.status_code = 503
+        response.headers['Retry-After'] = str(result.get('retry_after', 1))
+        return response
+
+    def deadline_exceeded(result):
+        """504 for a result that ran out of its request deadline"""
+        return jsonify(result), 504
 
     @app.route('/api/stats', methods=['GET'])
     def api_stats():
         """Get API statistics"""
+        def build():
+            return {
+                'success': True,
+                'data': {
+                    'total_topics': ContentManager.get_topic_count(),
+                    'total_content': ContentManager.get_content_count()
+                }
+            }, 200
+
+        return response_cache.cached_json('api_stats', [Topic, Content], build)
+
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        """Prometheus metrics aggregated across worker processes"""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/ready', methods=['GET'])
+    def readiness():
+        """Readiness probe reporting upstream admission saturation"""
+        stats = admission.stats()
+        ready = not (stats['enabled'] and stats['active'] >= stats['max_concurrent'] and stats['queue_full'])
+        return jsonify({
+            'ready': ready,
+            'admission': stats,
+            'upstream': upstream_breaker.stats()
+        }), 200 if ready else 503
+
+    @app.route('/api/cache/stats', methods=['GET'])
+    def api_cache_stats():
+        """Get response cache hit/miss statistics"""
         return jsonify({
             'success': True,
-            'data': {
-                'total_topics': ContentManager.get_topic_count(),
-                'total_content': ContentManager.get_content_count()
-            }
+            'data': response_cache.stats()
         })
 
     # ====== WIKIPEDIA API ROUTES ======
@@ -246,12 +437,24 @@ def create_app(config_name='development'):
                 'error': 'Topic must be at least 2 characters'
             }), 400
         
-        result = wiki_manager.search_wikipedia(topic)
+        try:
+            fields = fields_arg(WikipediaManager.SEARCH_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        result = wiki_manager.search_wikipedia(topic, deadline=deadlines.current(), fields=fields)
+        if result.get('upstream_unavailable'):
+            return upstream_unavailable(result)
+        if result.get('deadline_exceeded'):
+            return deadline_exceeded(result)
         return jsonify(result)
 
     @app.route('/api/wikipedia/fetch', methods=['POST'])
     def api_wikipedia_fetch():
-        """Fetch complete Wikipedia content"""
+        """Fetch Wikipedia content (all fields, or those selected with fields=)"""
         api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
         
         if not api_key:
@@ -275,10 +478,22 @@ def create_app(config_name='development'):
                 'error': 'Topic is required'
             }), 400
         
-        result = wiki_manager.fetch_wikipedia_content(topic)
+        try:
+            fields = fields_arg(WikipediaManager.FETCH_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        result = wiki_manager.fetch_wikipedia_content(topic, deadline=deadlines.current(), fields=fields)
         
         if result.get('success'):
             return jsonify(result)
+        elif result.get('upstream_unavailable'):
+            return upstream_unavailable(result)
+        elif result.get('deadline_exceeded'):
+            return deadline_exceeded(result)
         else:
             return jsonify(result), 404
 
@@ -299,22 +514,30 @@ def create_app(config_name='development'):
                 'error': 'Invalid API key'
             }), 401
         
-        cached = WikipediaManager.get_cached_content(topic)
-        
-        if cached:
-            return jsonify({
-                'success': True,
-                'data': cached
-            })
-        else:
+        try:
+            fields = fields_arg(WikipediaContent.FIELDS)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'No cached content found'
-            }), 404
+                'error': str(e)
+            }), 400
+
+        def build():
+            cached = WikipediaManager.get_cached_content_json(topic, fields)
+
+            if cached:
+                return '{"success":true,"data":' + cached + '}', 200
+            else:
+                return {
+                    'success': False,
+                    'error': 'No cached content found'
+                }, 404
+
+        return response_cache.cached_json('api_wikipedia_cached', [WikipediaContent, WikipediaAlias], build)
 
     @app.route('/api/wikipedia/cache/search', methods=['GET'])
     def api_wikipedia_cache_search():
-        """Search cached Wikipedia content"""
+        """Search cached Wikipedia content by title (mode=keyword) or ranked by similarity (mode=vector)"""
         api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
         
         if not api_key:
@@ -330,17 +553,176 @@ def create_app(config_name='development'):
             }), 401
         
         query = request.args.get('q', '').strip()
+
+        try:
+            fields = fields_arg(WikipediaContent.FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        mode = request.args.get('mode', 'keyword')
+        if mode not in ('keyword', 'vector'):
+            return jsonify({
+                'success': False,
+                'error': 'mode must be "keyword" or "vector"'
+            }), 400
+
+        if mode == 'vector':
+            if not query:
+                return jsonify({
+                    'success': False,
+                    'error': 'q is required for mode=vector'
+                }), 400
+            if not vector_index.available:
+                return jsonify({
+                    'success': False,
+                    'error': 'Vector search is not available (requires numpy)'
+                }), 501
+            limit = request.args.get('limit', 20, type=int)
+            limit = max(1, min(limit, app.config.get('VECTOR_SEARCH_MAX_LIMIT', 100)))
+
+            def build_ranked():
+                count, results = WikipediaManager.vector_search_cache_json(query, fields, limit)
+                return '{"success":true,"mode":"vector","count":' + str(count) + ',"data":' + results + '}', 200
+
+            return response_cache.cached_json('api_wikipedia_cache_search', [WikipediaContent], build_ranked)
+
+        if wants_ndjson():
+            # One document per line, read in batches; not cached, since the
+            # point is to never hold the whole listing in memory
+            batch_size = app.config.get('STREAM_BATCH_SIZE', 500)
+
+            def generate():
+                for document in WikipediaManager.iter_cached_json(query, fields, batch_size):
+                    yield document + '\n'
+
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+        def build():
+            # Cached articles carry a pre-serialized payload, so the listing
+            # is spliced together instead of being parsed and re-encoded
+            if not query:
+                count, results = WikipediaManager.get_all_cached_json(fields)
+            else:
+                count, results = WikipediaManager.search_cache_json(query, fields)
+
+            return '{"success":true,"count":' + str(count) + ',"data":' + results + '}', 200
+
+        return response_cache.cached_json('api_wikipedia_cache_search', [WikipediaContent], build)
+
+    @app.route('/api/wikipedia/<path:title>/sections', methods=['GET'])
+    def api_wikipedia_sections(title):
+        """Get the table of contents of a cached Wikipedia article"""
+        api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
         
-        if not query:
-            results = WikipediaManager.get_all_cached()
-        else:
-            results = WikipediaManager.search_cache(query)
+        if not api_key:
+            return jsonify({
+                'success': False,
+                'error': 'API key required'
+            }), 401
         
-        return jsonify({
-            'success': True,
-            'count': len(results),
-            'data': results
-        })
+        if not WikipediaManager.validate_api_key(api_key):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid API key'
+            }), 401
+
+        def build():
+            index = WikipediaManager.get_section_index(title)
+
+            if index is None:
+                return {
+                    'success': False,
+                    'error': 'No cached sections found'
+                }, 404
+
+            content_id, sections = index
+            return {
+                'success': True,
+                'title': title,
+                'content_id': content_id,
+                'count': len(sections),
+                'data': sections
+            }, 200
+
+        return response_cache.cached_json('api_wikipedia_sections', [WikipediaContent, WikipediaSection, WikipediaAlias],
+                                          build)
+
+    @app.route('/api/wikipedia/<path:title>/sections/<int:position>', methods=['GET'])
+    def api_wikipedia_section(title, position):
+        """Get one section of a cached Wikipedia article"""
+        api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
+        
+        if not api_key:
+            return jsonify({
+                'success': False,
+                'error': 'API key required'
+            }), 401
+        
+        if not WikipediaManager.validate_api_key(api_key):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid API key'
+            }), 401
+
+        def build():
+            section = WikipediaManager.get_section(title, position)
+
+            if section is None:
+                return {
+                    'success': False,
+                    'error': 'Section not found in cache'
+                }, 404
+
+            return {
+                'success': True,
+                'title': title,
+                'data': section
+            }, 200
+
+        return response_cache.cached_json('api_wikipedia_section', [WikipediaContent, WikipediaSection, WikipediaAlias],
+                                          build)
+
+    @app.route('/api/wikipedia/<path:title>/related', methods=['GET'])
+    def api_wikipedia_related(title):
+        """Cached articles most similar to a cached Wikipedia article"""
+        api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
+        
+        if not api_key:
+            return jsonify({
+                'success': False,
+                'error': 'API key required'
+            }), 401
+        
+        if not WikipediaManager.validate_api_key(api_key):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid API key'
+            }), 401
+
+        limit = request.args.get('limit', 10, type=int)
+        limit = max(1, min(limit, app.config.get('RELATED_MAX_LIMIT', 50)))
+
+        def build():
+            found = WikipediaManager.get_related(title, limit)
+
+            if found is None:
+                return {
+                    'success': False,
+                    'error': 'No cached content found'
+                }, 404
+
+            canonical, related = found
+            return {
+                'success': True,
+                'title': canonical,
+                'count': len(related),
+                'data': [{'title': other, 'score': score} for other, score in related]
+            }, 200
+
+        return response_cache.cached_json('api_wikipedia_related', [WikipediaContent, WikipediaAlias], build)
 
     @app.route('/api/wikipedia/download/<int:content_id>', methods=['GET'])
     def api_wikipedia_download(content_id):
@@ -359,8 +741,8 @@ def create_app(config_name='development'):
                 'error': 'Invalid API key'
             }), 401
         
-        from database import WikipediaContent
-        content = WikipediaContent.query.get(content_id)
+        from database import WikipediaContent, load_fields
+        content = WikipediaContent.query.options(load_fields(WikipediaContent)).get(content_id)
         
         if not content:
             return jsonify({
@@ -523,6 +905,130 @@ def create_app(config_name='development'):
             'data': [key.to_dict() for key in keys]
         })
 
+    # ====== ADMIN ROUTES ======
+    @app.route('/admin/profiles', methods=['GET'])
+    @admin_required
+    def admin_list_profiles():
+        """List saved request profiles"""
+        profiles = request_profiler.list_profiles()
+        return jsonify({
+            'success': True,
+            'count': len(profiles),
+            'data': profiles
+        })
+
+    @app.route('/admin/profiles/<name>', methods=['GET'])
+    @admin_required
+    def admin_get_profile(name):
+        """Download a saved profile, or view it as text with ?format=text"""
+        path = request_profiler.path_for(name)
+        if not path:
+            return jsonify({
+                'success': False,
+                'error': 'Profile not found'
+            }), 404
+
+        if request.args.get('format') == 'text':
+            sort = request.args.get('sort', 'cumulative')
+            try:
+                report = request_profiler.summary(path, sort=sort)
+            except KeyError:
+                return jsonify({
+                    'success': False,
+                    'error': f'Invalid sort key: {sort}'
+                }), 400
+            return Response(report, mimetype='text/plain')
+
+        return send_file(
+            os.path.abspath(path),
+            as_attachment=True,
+            download_name=name,
+            mimetype='application/octet-stream'
+        )
+
+    @app.route('/admin/slow-queries', methods=['GET', 'DELETE'])
+    @admin_required
+    def admin_slow_queries():
+        """Recent slow SQL statements (this worker) with their query plans"""
+        if request.method == 'DELETE':
+            slow_query_log.clear()
+            return jsonify({'success': True, 'message': 'Slow query log cleared'})
+
+        limit = request.args.get('limit', type=int)
+        entries = slow_query_log.recent(limit)
+        return jsonify({
+            'success': True,
+            'threshold_ms': slow_query_log.threshold * 1000,
+            'count': len(entries),
+            'data': entries
+        })
+
+    @app.route('/admin/memory', methods=['GET'])
+    @admin_required
+    def admin_memory():
+        """RSS, GC and tracemalloc status of the worker serving the request"""
+        return jsonify({
+            'success': True,
+            'data': memory_monitor.status(request.args.get('top', type=int))
+        })
+
+    @app.route('/admin/memory/tracemalloc', methods=['POST'])
+    @admin_required
+    def admin_memory_tracemalloc():
+        """Start or stop tracemalloc in this worker (?action=start|stop)"""
+        action = request.args.get('action', 'start')
+        if action == 'start':
+            memory_monitor.start_tracing(request.args.get('frames', type=int))
+        elif action == 'stop':
+            memory_monitor.stop_tracing()
+        else:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid action: {action}'
+            }), 400
+        return jsonify({
+            'success': True,
+            'data': memory_monitor.status(top=0)
+        })
+
+    @app.route('/admin/memory/snapshot', methods=['POST'])
+    @admin_required
+    def admin_memory_snapshot():
+        """Take a tracemalloc snapshot to diff against later"""
+        try:
+            snapshot_id = memory_monitor.take_snapshot()
+        except RuntimeError as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        return jsonify({
+            'success': True,
+            'data': {
+                'id': snapshot_id,
+                'top_allocations': memory_monitor.top_allocations(request.args.get('top', type=int))
+            }
+        }), 201
+
+    @app.route('/admin/memory/diff', methods=['GET'])
+    @admin_required
+    def admin_memory_diff():
+        """Allocation growth since a snapshot (?since=<id>, latest by default)"""
+        try:
+            since, stats = memory_monitor.diff(
+                request.args.get('since'),
+                request.args.get('top', type=int)
+            )
+        except RuntimeError as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        except KeyError:
+            return jsonify({'success': False, 'error': 'Snapshot not found'}), 404
+        return jsonify({
+            'success': True,
+            'data': {
+                'since': since,
+                'pid': os.getpid(),
+                'growth': stats
+            }
+        })
+
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1,90 @@
+class ExtractedArticle:
+    """Everything the fetch pipeline needs from a page, read from it once"""
+
+    __slots__ = ('title', 'summary', 'text', 'sections')
+
+    def __init__(self, title, summary, text, sections):
+        self.title = title
+        self.summary = summary
+        self.text = text
+        self.sections = sections
+
+
+def extract_article(page):
+    """Walk the page's section tree once, depth first, including subsections.
+
+    Builds the full article text with the same layout as wikipediaapi's
+    ``page.text`` (which is rebuilt by string concatenation on every
+    access) and a flat list of section rows, each locating its body within
+    that text by ``offset`` and ``length``.
+    """
+    summary = page.summary or ''
+    parts = []
+    sections = []
+    offset = 0
+    if summary:
+        parts.append(summary)
+        parts.append('\n\n')
+        offset = len(summary) + 2
+
+    # Iterative so that deeply nested pages can't hit the recursion limit
+    stack = [iter(page.sections)]
+    while stack:
+        section = next(stack[-1], None)
+        if section is None:
+            stack.pop()
+            continue
+        body = section.text
+        parts.append(section.title)
+        parts.append('\n')
+        offset += len(section.title) + 1
+        sections.append({
+            'position': len(sections),
+            'title': section.title,
+            'level': section.level,
+            'offset': offset,
+            'length': len(body),
+            'text': body
+        })
+        if body:
+            parts.append(body)
+            parts.append('\n\n')
+            offset += len(body) + 2
+        stack.append(iter(section.sections))
+
+    # page.text is stripped; move the sections with it, cutting the last
+    # section's body where trailing whitespace was removed
+    text = ''.join(parts)
+    stripped = text.lstrip()
+    lead = len(text) - len(stripped)
+    text = stripped.rstrip()
+    for row in sections:
+        start = min(max(row['offset'] - lead, 0), len(text))
+        end = min(max(row['offset'] + row['length'] - lead, 0), len(text))
+        if (start, end - start) != (row['offset'], row['length']):
+            row['offset'] = start
+            row['length'] = end - start
+            row['text'] = text[start:end]
+
+    return ExtractedArticle(page.title, summary, text, sections)
+
+
+def format_article(article, max_sections=5, overview_length=1000, section_length=500):
+    """Render the Markdown-style content stored for an article"""
+    parts = [
+        '\n# ', article.title, '\n\n## Summary\n', article.summary,
+        '\n\n## Overview\n', article.text[:overview_length], '...\n\n## Key Sections\n'
+    ]
+    shown = 0
+    for section in article.sections:
+        if shown >= max_sections:
+            break
+        if not section['text'].strip():
+            continue
+        parts.append('\n' + '#' * (section['level'] + 2) + ' ')
+        parts.append(section['title'])
+        parts.append('\n')
+        parts.append(section['text'][:section_length])
+        parts.append('...\n')
+        shown += 1
+    return ''.join(parts)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark compressed storage of cached Wikipedia articles.
+
+Stores the same generated articles in two SQLite databases, one with the
+large text columns as plain TEXT and one through the WikipediaContent
+model (compressed), then reports the database file sizes and the median
+time to load every row with and without reading the article body. The
+generated text is highly repetitive, so it compresses much better than
+real articles; use the size ratio as an upper bound.
+
+    python benchmarks/bench_compression.py --articles 200
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from stub_wikipedia import make_page  # noqa: E402
+
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        page = make_page(f'Article {i}')
+        rows.append({
+            'topic_name': page['title'],
+            'title': page['title'],
+            'content': page['extract'],
+            'url': f'https://en.wikipedia.org/wiki/Article_{i}',
+            'summary': page['extract'][:500],
+            'categories': json.dumps(page['categories'][:20]),
+            'references': json.dumps(page['links'][:15])
+        })
+    return rows
+
+
+def median_ms(operation, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        operation()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def bench_plain(path, rows, rounds):
+    """Same columns, stored as uncompressed TEXT"""
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE wikipedia_content (id INTEGER PRIMARY KEY, topic_name TEXT, title TEXT, '
+                 'content TEXT, url TEXT, summary TEXT, categories TEXT, "references" TEXT, payload TEXT)')
+    conn.executemany(
+        'INSERT INTO wikipedia_content (topic_name, title, content, url, summary, categories, "references", payload) '
+        'VALUES (:topic_name, :title, :content, :url, :summary, :categories, :references, :payload)',
+        [dict(row, payload=json.dumps(row)) for row in rows]
+    )
+    conn.commit()
+    conn.execute('VACUUM')
+    query = 'SELECT * FROM wikipedia_content'
+
+    def load():
+        return [row[2] for row in conn.execute(query)]
+
+    def read():
+        return sum(len(row[4]) for row in conn.execute(query))
+
+    result = {
+        'size_bytes': os.path.getsize(path),
+        'load_median_ms': median_ms(load, rounds),
+        'load_and_read_content_median_ms': median_ms(read, rounds)
+    }
+    conn.close()
+    return result
+
+
+def bench_compressed(path, rows, rounds):
+    """The real model, with compressed columns"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    os.environ['INIT_DB_ON_STARTUP'] = '1'
+    from app import create_app
+    from database import db, WikipediaContent
+
+    app = create_app('production')
+    with app.app_context():
+        db.session.add_all(WikipediaContent(**row) for row in rows)
+        db.session.commit()
+        db.session.execute(db.text('VACUUM'))
+
+        def load():
+            db.session.expunge_all()
+            return [item.title for item in WikipediaContent.query.all()]
+
+        def read():
+            db.session.expunge_all()
+            return sum(len(item.content) for item in WikipediaContent.query.all())
+
+        return {
+            'size_bytes': os.path.getsize(path),
+            'load_median_ms': median_ms(load, rounds),
+            'load_and_read_content_median_ms': median_ms(read, rounds)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compressed article storage')
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='wiki-compression-')
+    rows = make_rows(args.articles)
+    # Keep stdout clean for the JSON report; the app prints diagnostics
+    with contextlib.redirect_stdout(sys.stderr):
+        report = {
+            'articles': args.articles,
+            'plain': bench_plain(os.path.join(directory, 'plain.db'), rows, args.rounds),
+            'compressed': bench_compressed(os.path.join(directory, 'compressed.db'), rows, args.rounds)
+        }
+    report['size_ratio'] = round(report['compressed']['size_bytes'] / report['plain']['size_bytes'], 3)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark article extraction and formatting on large pages.
+
+Compares the single-pass extractor (article_extractor.py) with the
+previous approach, which rebuilt ``page.text`` on every access and
+formatted the output by repeated string concatenation. Pages come from
+the stub server, generated with a growing number of sections, or from a
+recorded cassette:
+
+    python benchmarks/bench_extractor.py --sections 10 100 1000
+    python benchmarks/bench_extractor.py --cassette cassettes/wikipedia.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from stub_wikipedia import StubWikipedia, StubWikipediaServer, make_page  # noqa: E402
+from article_extractor import extract_article, format_article  # noqa: E402
+from wikipedia_client import WikipediaClient  # noqa: E402
+
+
+def legacy_extract(page):
+    """The fetch pipeline's former text handling, kept for comparison"""
+    if not page.text or len(page.text.strip()) < 100:
+        return None
+    full_text = page.text if page.text else ''
+    formatted = f"""
+# {page.title}
+
+## Summary
+{page.summary}
+
+## Overview
+{page.text[:1000]}...
+
+## Key Sections
+"""
+    for section in page.sections[:5]:
+        if section.text:
+            formatted += f"\n### {section.title}\n{section.text[:500]}...\n"
+    return full_text, formatted
+
+
+def single_pass(page):
+    article = extract_article(page)
+    return article.text, format_article(article)
+
+
+def time_ms(operation, page, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        operation(page)
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def compare(page, rounds):
+    # The extracts call happens here, outside the timed region
+    text = page.text
+    article = extract_article(page)
+    assert article.text == text, 'single-pass text differs from page.text'
+    return {
+        'text_chars': len(text),
+        'sections': len(article.sections),
+        'legacy_median_ms': time_ms(legacy_extract, page, rounds),
+        'single_pass_median_ms': time_ms(single_pass, page, rounds)
+    }
+
+
+def stub_pages(section_counts, subsections):
+    pages = [make_page(f'Large article {n}', sections=n, subsections=subsections, links=0, categories=0)
+             for n in section_counts]
+    server = StubWikipediaServer(StubWikipedia(pages))
+    server.start()
+    client = WikipediaClient(api_url=server.url)
+    try:
+        for page in pages:
+            wiki_page = client.page(page['title'])
+            wiki_page.summary
+            yield page['title'], wiki_page
+    finally:
+        server.stop()
+
+
+def cassette_pages(path):
+    client = WikipediaClient(transport='replay', cassette=path)
+    for topic in sorted(client.cassette.fetches):
+        page = client.page(topic)
+        page.summary
+        yield topic, page
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single-pass article extraction')
+    parser.add_argument('--sections', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--subsections', type=int, default=3)
+    parser.add_argument('--cassette', help='Use the pages recorded in this cassette instead of generated ones')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    pages = cassette_pages(args.cassette) if args.cassette else stub_pages(args.sections, args.subsections)
+    report = {title: compare(page, args.rounds) for title, page in pages}
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
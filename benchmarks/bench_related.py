@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark related-article lookups (related_index.py).
+
+Indexes generated articles (random mixes of a few "topics" of words from
+the standard library's source) and reports build time, matrix size and
+lookup latency. Runs with NumPy if installed, otherwise the pure Python
+fallback is measured:
+
+    python benchmarks/bench_related.py --articles 1000 10000 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench_title_index import vocabulary  # noqa: E402
+import related_index  # noqa: E402
+
+
+def make_articles(count, words, rng, topics=200, length=400):
+    vocabularies = [rng.sample(words, 50) for _ in range(topics)]
+    articles = []
+    for i in range(count):
+        mix = rng.sample(vocabularies, 2)
+        articles.append((f'Article {i}', ' '.join(rng.choice(rng.choice(mix)) for _ in range(length))))
+    return articles
+
+
+def bench(count, words, args):
+    rng = random.Random(count)
+    articles = make_articles(count, words, rng)
+    index = related_index.RelatedIndex(dimensions=args.dimensions)
+
+    start = time.perf_counter()
+    for title, text in articles:
+        index.add(title, text)
+    build_seconds = time.perf_counter() - start
+
+    samples = []
+    for title, _ in rng.sample(articles, min(args.queries, count)):
+        start = time.perf_counter()
+        index.related(title, 10)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'articles': count,
+        'numpy': related_index.numpy is not None,
+        'build_seconds': round(build_seconds, 2),
+        'matrix_mb': round(count * args.dimensions * 4 / 1e6, 1),
+        'lookup_p50_ms': round(statistics.median(samples), 3),
+        'lookup_p95_ms': round(samples[int(len(samples) * 0.95)], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark related-article lookups')
+    parser.add_argument('--articles', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--dimensions', type=int, default=1024)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    words = vocabulary()
+    report = [bench(count, words, args) for count in args.articles]
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmark application startup as seen by a freshly forked worker.
+
+Each sample runs in a new interpreter so import costs are measured cold:
+
+* ``import``          - importing the ``app`` module
+* ``create_app``      - building the app with INIT_DB_ON_STARTUP off
+* ``create_app+init`` - building the app with schema setup and seeding
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app('production')
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_ms': (created - imported) * 1000,
+    'heavy_modules': sorted(m for m in ('fpdf', 'wikipediaapi') if m in sys.modules)
+}))
+"""
+
+
+def run_probe(init_db, database_dir):
+    env = dict(os.environ)
+    env['INIT_DB_ON_STARTUP'] = '1' if init_db else '0'
+    env['FLASK_ENV'] = 'production'
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(database_dir, 'wiki.db')
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=database_dir,
+        env=dict(env, PYTHONPATH=REPO_ROOT),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    return {
+        'runs': len(samples),
+        'mean_ms': round(statistics.mean(samples), 2),
+        'median_ms': round(statistics.median(samples), 2),
+        'min_ms': round(min(samples), 2),
+        'max_ms': round(max(samples), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as database_dir:
+        # The first run creates and seeds the SQLite file; later runs see
+        # an initialized database, as restarted workers would.
+        for init_db, label in ((True, 'create_app+init'), (False, 'create_app')):
+            samples = [run_probe(init_db, database_dir) for _ in range(args.runs)]
+            results[label] = summarize([s['create_ms'] for s in samples])
+            results[label]['heavy_modules_loaded'] = samples[-1]['heavy_modules']
+            results.setdefault('import', []).extend(s['import_ms'] for s in samples)
+
+    results['import'] = summarize(results['import'])
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
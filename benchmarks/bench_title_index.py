@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark the typo-tolerant title index (title_index.py).
+
+Builds the index over generated titles (one to three words drawn from the
+identifiers in the standard library's source) and looks up misspelled
+copies of some of them, reporting build time and memory, lookup latency
+percentiles and how often the original title was found:
+
+    python benchmarks/bench_title_index.py --titles 10000 100000 300000
+    python benchmarks/bench_title_index.py --titles 100000 --max-distance 2
+"""
+
+import argparse
+import collections
+import glob
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from title_index import TitleIndex  # noqa: E402
+
+
+def vocabulary(size=20000):
+    """Common lowercase words from the standard library's source"""
+    counts = collections.Counter()
+    for path in glob.glob(os.path.join(os.path.dirname(os.__file__), '*.py')):
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            counts.update(re.findall(r'\b[a-z]{3,12}\b', f.read()))
+    return [word for word, _ in counts.most_common(size)]
+
+
+def make_titles(count, words, rng):
+    titles = set()
+    while len(titles) < count:
+        title = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+        titles.add(title[0].upper() + title[1:])
+    return list(titles)
+
+
+def misspell(title, edits, rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    for _ in range(edits):
+        i = rng.randrange(len(title))
+        kind = rng.choice(('delete', 'insert', 'replace'))
+        if kind == 'delete' and len(title) > 1:
+            title = title[:i] + title[i + 1:]
+        elif kind == 'insert':
+            title = title[:i] + rng.choice(letters) + title[i:]
+        else:
+            title = title[:i] + rng.choice(letters) + title[i + 1:]
+    return title
+
+
+def bench(count, words, args):
+    rng = random.Random(count)
+    titles = make_titles(count, words, rng)
+
+    def build():
+        index = TitleIndex(max_distance=args.max_distance, prefix_length=args.prefix_length)
+        for title in titles:
+            index.add(title, title)
+        return index
+
+    # Timed and measured separately, since tracing allocations slows the build down
+    tracemalloc.start()
+    index = build()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del index
+    start = time.perf_counter()
+    index = build()
+    build_seconds = time.perf_counter() - start
+
+    samples = []
+    found = 0
+    for title in rng.sample(titles, min(args.queries, len(titles))):
+        query = misspell(title, rng.randint(1, args.max_distance), rng)
+        start = time.perf_counter()
+        matches = index.lookup(query)
+        samples.append((time.perf_counter() - start) * 1000)
+        found += any(match == title for match, _ in matches)
+    samples.sort()
+    return {
+        'titles': count,
+        'build_seconds': round(build_seconds, 2),
+        'memory_mb': round(memory / 1e6, 1),
+        'lookup_p50_ms': round(statistics.median(samples), 3),
+        'lookup_p95_ms': round(samples[int(len(samples) * 0.95)], 3),
+        'recall': round(found / len(samples), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the typo-tolerant title index')
+    parser.add_argument('--titles', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--max-distance', type=int, default=1)
+    parser.add_argument('--prefix-length', type=int, default=7)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    words = vocabulary()
+    report = [bench(count, words, args) for count in args.titles]
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark mode=vector cache search (vector_search.py).
+
+Caches generated articles in a temporary SQLite database, builds the
+memory-mapped vector index from them (timed, then again after adding 1%
+more articles to show the incremental append) and reports query latency
+for the ranking alone. Requires NumPy:
+
+    python benchmarks/bench_vector_search.py --articles 1000 10000 50000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench_title_index import vocabulary  # noqa: E402
+from bench_related import make_articles  # noqa: E402
+
+
+def timed(operation):
+    start = time.perf_counter()
+    operation()
+    return round(time.perf_counter() - start, 2)
+
+
+def bench(count, words, args):
+    directory = tempfile.mkdtemp(prefix='wiki-vectors-')
+    os.environ['INIT_DB_ON_STARTUP'] = '1'
+    import config
+    # Set on the class as well, since config only reads the environment once
+    config.Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'bench.db')
+    config.Config.VECTOR_SEARCH_DIR = os.path.join(directory, 'vectors')
+    config.Config.VECTOR_SEARCH_DIMENSIONS = args.dimensions
+    from app import create_app
+    from database import db, WikipediaContent
+    from vector_search import vector_index
+
+    rng = random.Random(count)
+    articles = make_articles(count + count // 100, words, rng)
+
+    def add(batch):
+        db.session.add_all(
+            WikipediaContent(topic_name=title, title=title, content=text, url='', summary=text[:300])
+            for title, text in batch
+        )
+        db.session.commit()
+
+    app = create_app('production')
+    with app.app_context():
+        add(articles[:count])
+        build_seconds = timed(vector_index.refresh)
+        add(articles[count:])
+        append_seconds = timed(vector_index.refresh)
+
+        samples = []
+        for _, text in rng.sample(articles, args.queries):
+            words_in_text = text.split()
+            start_word = rng.randrange(len(words_in_text) - 3)
+            query = ' '.join(words_in_text[start_word:start_word + 3])
+            start = time.perf_counter()
+            vector_index.search(query, 20)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return {
+            'articles': vector_index.rows,
+            'build_seconds': build_seconds,
+            'append_1_percent_seconds': append_seconds,
+            'file_mb': round(os.path.getsize(os.path.join(directory, 'vectors', 'vectors.f32')) / 1e6, 1),
+            'search_p50_ms': round(statistics.median(samples), 3),
+            'search_p95_ms': round(samples[int(len(samples) * 0.95)], 3)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vector cache search')
+    parser.add_argument('--articles', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--dimensions', type=int, default=512)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    words = vocabulary()
+    # Keep stdout clean for the JSON report; the app prints diagnostics
+    with contextlib.redirect_stdout(sys.stderr):
+        report = [bench(count, words, args) for count in args.articles]
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Replay a recorded upstream cassette through the fetch and formatting pipeline.
+
+Record a cassette by running the app with WIKIPEDIA_TRANSPORT=record
+(responses are written to WIKIPEDIA_CASSETTE), then replay it offline:
+
+    python benchmarks/replay_cassette.py cassettes/wikipedia.jsonl --rounds 20
+    python benchmarks/replay_cassette.py cassettes/wikipedia.jsonl --profile fetch.prof
+
+Every logical fetch recorded in the cassette is replayed with no network
+access. The report lists latency and upstream round trips per topic.
+"""
+
+import argparse
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def replay(cassette_path, rounds, topics=None):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='wiki-replay-'), 'replay.db')
+    os.environ['INIT_DB_ON_STARTUP'] = '1'
+
+    from app import create_app
+    from file_generator import FileGenerator
+    from wikipedia_manager import WikipediaManager
+
+    app = create_app('production')
+    manager = WikipediaManager(transport='replay', cassette=cassette_path)
+    file_gen = FileGenerator(tempfile.mkdtemp(prefix='wiki-replay-files-'))
+    topics = topics or sorted(manager.wiki.cassette.fetches)
+    if not topics:
+        raise SystemExit(f'{cassette_path} has no recorded fetches')
+
+    report = {}
+    with app.app_context():
+        for topic in topics:
+            fetch_ms, format_ms = [], []
+            calls = None
+            for _ in range(rounds):
+                start = time.perf_counter()
+                result = manager.fetch_wikipedia_content(topic)
+                fetch_ms.append((time.perf_counter() - start) * 1000)
+                if not result.get('success'):
+                    raise SystemExit(f'Replay of "{topic}" failed: {result.get("message")}')
+                calls = result['upstream_calls']
+
+                start = time.perf_counter()
+                for renderer in (file_gen.generate_markdown_from_wikipedia,
+                                 file_gen.generate_text_from_wikipedia,
+                                 file_gen.generate_pdf_from_wikipedia):
+                    _, filepath = renderer(result['title'], result['content'], result['url'])
+                    os.remove(filepath)
+                format_ms.append((time.perf_counter() - start) * 1000)
+
+            report[topic] = {
+                'upstream_calls': calls,
+                'recorded_upstream_calls': manager.wiki.cassette.fetches.get(topic),
+                'fetch_median_ms': round(statistics.median(fetch_ms), 3),
+                'format_median_ms': round(statistics.median(format_ms), 3)
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded Wikipedia cassette offline')
+    parser.add_argument('cassette')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--topic', action='append', help='Replay only these topics')
+    parser.add_argument('--profile', help='Write cProfile stats for the whole replay to this file')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    # Keep stdout clean for the JSON report; the app prints diagnostics
+    with contextlib.redirect_stdout(sys.stderr):
+        report = replay(args.cassette, args.rounds, args.topic)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(20)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Benchmark suite running the app against the offline stub Wikipedia server.
+
+Measures throughput and p50/p90/p99 latency for:
+
+* ``fetch``            - POST /api/wikipedia/fetch (upstream via the stub)
+* ``wikipedia_search`` - POST /api/wikipedia/search
+* ``cached_lookup``    - GET /api/wikipedia/cached/<topic>
+* ``cache_search``     - GET /api/wikipedia/cache/search?q=...
+* ``autocomplete``     - GET /api/topics/search?q=... (search-as-you-type)
+* ``format_<fmt>``     - each FileGenerator output format
+
+Results are written as JSON. Pass ``--compare`` with an earlier results file
+to flag regressions; the exit status is 1 if any scenario regressed.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from stub_wikipedia import StubWikipedia, StubWikipediaServer, DEFAULT_TITLES  # noqa: E402
+
+FORMATS = ['pdf', 'markdown', 'text']
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100.0 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[rank]
+
+
+def measure(operation, iterations, warmup=2, concurrency=1):
+    """Run ``operation(i)`` repeatedly and summarize latency and throughput"""
+    for i in range(warmup):
+        operation(i)
+
+    def timed(i):
+        start = time.perf_counter()
+        operation(i)
+        return (time.perf_counter() - start) * 1000
+
+    wall_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, range(iterations)))
+    else:
+        samples = [timed(i) for i in range(iterations)]
+    wall = time.perf_counter() - wall_start
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'throughput_per_s': round(iterations / wall, 2) if wall else 0.0,
+        'mean_ms': round(statistics.mean(samples), 3),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p90_ms': round(percentile(samples, 90), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'max_ms': round(samples[-1], 3)
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args, workdir):
+    stub = StubWikipedia(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    server = StubWikipediaServer(stub).start()
+
+    os.environ['WIKIPEDIA_API_URL'] = server.url
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['INIT_DB_ON_STARTUP'] = '1'
+
+    from app import create_app
+    from database import APIKey
+    from file_generator import FileGenerator
+    from response_cache import response_cache
+
+    app = create_app('production')
+    app.config['DOWNLOAD_FOLDER'] = os.path.join(workdir, 'downloads')
+    if args.no_response_cache:
+        response_cache.max_entries = 0
+    client = app.test_client()
+
+    with app.app_context():
+        headers = {'X-API-Key': APIKey.query.first().key}
+
+    topics = DEFAULT_TITLES
+    results = {}
+
+    def fetch(i):
+        response = client.post('/api/wikipedia/fetch', headers=headers,
+                               json={'topic': topics[i % len(topics)]})
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    def wikipedia_search(i):
+        client.post('/api/wikipedia/search', headers=headers, json={'topic': topics[i % len(topics)]})
+
+    def cached_lookup(i):
+        response = client.get(f'/api/wikipedia/cached/{topics[i % len(topics)]}', headers=headers)
+        assert response.status_code == 200
+
+    def cache_search(i):
+        client.get('/api/wikipedia/cache/search', headers=headers,
+                   query_string={'q': ['learn', 'comput', 'lang', ''][i % 4]})
+
+    def autocomplete(i):
+        client.get('/api/topics/search', query_string={'q': ['ja', 'py', 'web', 'pro'][i % 4]})
+
+    upstream_before = stub.request_count
+    results['fetch'] = measure(fetch, args.iterations, concurrency=args.concurrency)
+    results['fetch']['upstream_requests_per_op'] = round(
+        (stub.request_count - upstream_before) / (args.iterations + 2), 2)
+    results['wikipedia_search'] = measure(wikipedia_search, args.iterations, concurrency=args.concurrency)
+    results['cached_lookup'] = measure(cached_lookup, args.iterations, concurrency=args.concurrency)
+    results['cache_search'] = measure(cache_search, args.iterations, concurrency=args.concurrency)
+    results['autocomplete'] = measure(autocomplete, args.iterations, concurrency=args.concurrency)
+
+    file_gen = FileGenerator(os.path.join(workdir, 'formats'))
+    with app.app_context():
+        article = client.get(f'/api/wikipedia/cached/{topics[0]}', headers=headers).get_json()['data']
+    renderers = {
+        'pdf': file_gen.generate_pdf_from_wikipedia,
+        'markdown': file_gen.generate_markdown_from_wikipedia,
+        'text': file_gen.generate_text_from_wikipedia
+    }
+    for fmt in FORMATS:
+        produced = set()
+
+        def render(i, renderer=renderers[fmt]):
+            filename, filepath = renderer(article['title'], article['content'], article['url'])
+            produced.add(os.path.splitext(filename)[1])
+            os.remove(filepath)
+        results[f'format_{fmt}'] = measure(render, max(1, args.iterations // 2))
+        # A PDF that fails to render falls back to .txt; make that visible
+        results[f'format_{fmt}']['output_extensions'] = sorted(produced)
+
+    server.stop()
+    return results
+
+
+def compare(current, baseline, threshold):
+    """List scenarios whose p50 or p99 latency regressed beyond the threshold"""
+    regressions = []
+    for name, stats in current.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            before, after = previous.get(metric), stats.get(metric)
+            if before and after and after > before * (1 + threshold):
+                regressions.append({
+                    'scenario': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change': round(after / before - 1, 3)
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark suite')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='Artificial upstream latency per stub request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--no-response-cache', action='store_true')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative slowdown before flagging a regression')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='wiki-bench-')
+    try:
+        # Keep stdout clean for the JSON report; the app prints diagnostics
+        with contextlib.redirect_stdout(sys.stderr):
+            scenarios = run_suite(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'response_cache': not args.no_response_cache
+        },
+        'scenarios': scenarios
+    }
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(scenarios, baseline.get('scenarios', {}), args.threshold)
+        exit_code = 1 if report['regressions'] else 0
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Offline stub of the MediaWiki query API used by wikipediaapi.
+
+Serves canned pages for ``action=query`` with ``prop=info``, ``extracts``,
+``links`` and ``categories``, alone or combined with ``|`` (including
+``continue`` pagination), with a configurable artificial latency per
+request.
+
+Run standalone:  python benchmarks/stub_wikipedia.py --port 8765 --latency-ms 50
+then start the app with WIKIPEDIA_API_URL=http://127.0.0.1:8765/w/api.php
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse, quote
+
+DEFAULT_TITLES = [
+    'Machine learning',
+    'Artificial intelligence',
+    'Python (programming language)',
+    'Quantum computing',
+    'Neural network',
+    'Java (programming language)',
+    'Database',
+    'Algorithm'
+]
+
+DEFAULT_REDIRECTS = {
+    'Machine learning': ['ML'],
+    'Artificial intelligence': ['AI']
+}
+
+LOREM = (
+    'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, '
+    'quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. '
+)
+
+
+def make_page(title, sections=12, subsections=2, paragraphs=4, links=800, categories=40,
+              redirects=()):
+    """Build a deterministic canned page in wikipediaapi's WIKI extract format"""
+    rng = random.Random(title)
+    parts = [f'{title} is a canned article served by the stub server. ' + LOREM * 3]
+    for s in range(sections):
+        parts.append(f'\n\n== Section {s + 1} ==\n')
+        parts.append(''.join(LOREM * rng.randint(1, 3) + '\n' for _ in range(paragraphs)))
+        for sub in range(subsections):
+            parts.append(f'\n\n=== Section {s + 1}.{sub + 1} ===\n')
+            parts.append(LOREM * rng.randint(1, 2))
+    return {
+        'title': title,
+        'extract': ''.join(parts),
+        'links': [f'{title} link {i}' for i in range(links)],
+        'categories': [f'Category:{title} category {i}' for i in range(categories)],
+        'redirects': list(redirects)
+    }
+
+
+class StubWikipedia:
+    """In-memory page store answering MediaWiki query requests"""
+
+    def __init__(self, pages=None, latency_ms=0.0, jitter_ms=0.0):
+        if pages is None:
+            pages = [make_page(t, redirects=DEFAULT_REDIRECTS.get(t, ())) for t in DEFAULT_TITLES]
+        self.pages = {}
+        self.redirects = {}
+        for index, page in enumerate(pages):
+            page.setdefault('pageid', 1000 + index)
+            self.pages[page['title'].casefold()] = page
+            for source in page.get('redirects', ()):
+                self.redirects[source.casefold()] = page
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def handle(self, params):
+        """Answer a query request given its (single-valued) parameters"""
+        with self._lock:
+            self.request_count += 1
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        requested = params.get('titles', '')
+        page = self.pages.get(requested.casefold())
+        query = {}
+        if page is None and params.get('redirects'):
+            page = self.redirects.get(requested.casefold())
+            if page is not None:
+                query['redirects'] = [{'from': requested, 'to': page['title']}]
+        if page is None:
+            query['pages'] = {'-1': {'ns': 0, 'title': requested, 'missing': ''}}
+            return {'batchcomplete': '', 'query': query}
+
+        if page['title'] != requested and 'redirects' not in query:
+            query['normalized'] = [{'from': requested, 'to': page['title']}]
+
+        entry = {'pageid': page['pageid'], 'ns': 0, 'title': page['title']}
+        result = {'batchcomplete': '', 'query': query}
+        props = params.get('prop', '').split('|')
+
+        if 'info' in props:
+            url = 'https://en.wikipedia.org/wiki/' + quote(page['title'].replace(' ', '_'))
+            entry.update({
+                'contentmodel': 'wikitext',
+                'pagelanguage': 'en',
+                'length': len(page['extract']),
+                'fullurl': url,
+                'canonicalurl': url,
+                'editurl': url + '?action=edit',
+                'displaytitle': page['title']
+            })
+        if 'extracts' in props:
+            entry['extract'] = page['extract']
+        if 'links' in props:
+            self._paginate(result, entry, 'links', 'pl', params,
+                           [{'ns': 0, 'title': t} for t in page['links']])
+        if 'categories' in props:
+            self._paginate(result, entry, 'categories', 'cl', params,
+                           [{'ns': 14, 'title': t} for t in page['categories']])
+
+        query['pages'] = {str(page['pageid']): entry}
+        return result
+
+    @staticmethod
+    def _paginate(result, entry, key, prefix, params, items):
+        limit = params.get(prefix + 'limit', '10')
+        limit = len(items) if limit == 'max' else int(limit)
+        offset = int(params.get(prefix + 'continue', '0'))
+        entry[key] = items[offset:offset + limit]
+        if offset + limit < len(items):
+            result.setdefault('continue', {'continue': '||'})[prefix + 'continue'] = str(offset + limit)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != '/w/api.php':
+            self.send_error(404)
+            return
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        body = json.dumps(self.server.stub.handle(params)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubWikipediaServer:
+    """Runs a StubWikipedia behind an HTTP server on a background thread"""
+
+    def __init__(self, stub=None, host='127.0.0.1', port=0):
+        self.stub = stub or StubWikipedia()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self.stub
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/w/api.php'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline stub MediaWiki API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--pages', help='JSON file with a list of pages '
+                                        '({title, extract, links, categories, redirects})')
+    args = parser.parse_args()
+
+    pages = None
+    if args.pages:
+        with open(args.pages, encoding='utf-8') as f:
+            pages = json.load(f)
+
+    stub = StubWikipedia(pages, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    server = StubWikipediaServer(stub, host=args.host, port=args.port)
+    print(f'Stub Wikipedia API listening on {server.url}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
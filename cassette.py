@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+class Cassette:
+    """On-disk recording of upstream MediaWiki responses.
+
+    Responses are keyed by their full query parameters, so replaying the
+    same sequence of page property accesses is deterministic. The number
+    of upstream calls made by each recorded logical fetch is kept too.
+
+    The file holds one JSON object per line, either an interaction
+    (``key`` and ``response``) or a fetch (``fetch`` and
+    ``upstream_calls``); recording appends a line, so it costs the same
+    however large the cassette gets. Later lines win, and cassettes
+    written as a single JSON document by older versions still load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.interactions = {}
+        self.fetches = {}
+        self._lock = threading.Lock()
+        self._needs_newline = False
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                self._needs_newline = not line.endswith('\n')
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # blank, or cut short by an interrupted write
+                if 'interactions' in entry or 'fetches' in entry:
+                    self.interactions.update(entry.get('interactions', {}))
+                    self.fetches.update(entry.get('fetches', {}))
+                elif 'key' in entry:
+                    self.interactions[entry['key']] = entry['response']
+                elif 'fetch' in entry:
+                    self.fetches[entry['fetch']] = entry['upstream_calls']
+
+    @staticmethod
+    def make_key(params):
+        """Build a stable key from request parameters"""
+        return json.dumps(sorted((str(k), str(v)) for k, v in params.items()))
+
+    def get(self, params):
+        """Get the recorded response for a request"""
+        key = self.make_key(params)
+        if key not in self.interactions:
+            raise CassetteMissError(f'No recorded response for {key}')
+        return self.interactions[key]
+
+    def record(self, params, response):
+        """Record a response and append it to the cassette"""
+        key = self.make_key(params)
+        with self._lock:
+            self.interactions[key] = response
+            self._append({'key': key, 'response': response})
+
+    def record_fetch(self, topic, upstream_calls):
+        """Record how many upstream calls a logical fetch made"""
+        with self._lock:
+            self.fetches[topic] = upstream_calls
+            self._append({'fetch': topic, 'upstream_calls': upstream_calls})
+
+    def _append(self, entry):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(entry) + '\n'
+        if self._needs_newline:
+            line = '\n' + line
+            self._needs_newline = False
+        # One write per line, so lines from several workers don't interleave
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
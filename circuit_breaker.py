@@ -0,0 +1,131 @@
+import threading
+import time
+from metrics import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the circuit is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f'Circuit "{name}" is open, retry in {retry_after}s')
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(error):
+    """Whether an exception means the upstream is unhealthy.
+
+    Timeouts, connection errors, 5xx and 429 responses count; other 4xx
+    responses come from a healthy server and don't.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        return status >= 500 or status == 429
+    return True
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for calls to an upstream service.
+
+    After ``failure_threshold`` failures in a row the circuit opens and
+    calls fail immediately with CircuitOpenError. Once ``reset_timeout``
+    seconds have passed a single probe call is let through (half-open):
+    if it succeeds the circuit closes, otherwise it opens for another
+    ``reset_timeout``. State is kept per worker process.
+    """
+
+    def __init__(self, name='upstream', failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.enabled = True
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CIRCUIT_BREAKER_ENABLED', True)
+        self.failure_threshold = app.config.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', self.failure_threshold)
+        self.reset_timeout = app.config.get('CIRCUIT_BREAKER_RESET_TIMEOUT', self.reset_timeout)
+        app.extensions['circuit_breaker'] = self
+
+    def before_call(self):
+        """Check that a call may go upstream; raises CircuitOpenError if not"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            retry_after = self._retry_after()
+        metrics.inc('circuit_breaker_rejected_total', breaker=self.name)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                self._transition(OPEN)
+
+    def record_cancelled(self):
+        """A call that says nothing about upstream health (e.g. cut short by a deadline)"""
+        with self._lock:
+            self._probing = False
+
+    def retry_after(self):
+        """Seconds until the next probe is allowed (0 when closed)"""
+        with self._lock:
+            return self._retry_after()
+
+    def _retry_after(self):
+        if self.state == CLOSED:
+            return 0
+        remaining = self.reset_timeout - (self.clock() - self.opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def _transition(self, state):
+        # Called with the lock held
+        self.state = state
+        metrics.inc('circuit_breaker_transitions_total', breaker=self.name, state=state)
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'retry_after': self._retry_after(),
+                'rejected': self.rejected
+            }
+
+
+upstream_breaker = CircuitBreaker('wikipedia')
@@ -0,0 +1,77 @@
+import zlib
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+# Stored values start with a marker byte: compressed, or raw UTF-8 for
+# values too short to be worth compressing
+ZLIB_MARKER = b'z'
+RAW_MARKER = b'r'
+
+COMPRESSION_LEVEL = 6
+MIN_COMPRESS_LENGTH = 128  # characters
+
+
+def compress_text(value):
+    """Encode text for storage, zlib-compressing it if it is long enough"""
+    data = value.encode('utf-8')
+    if len(value) >= MIN_COMPRESS_LENGTH:
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        if len(compressed) < len(data):
+            return ZLIB_MARKER + compressed
+    return RAW_MARKER + data
+
+
+def decompress_text(value):
+    """Decode a stored value; legacy uncompressed rows come back as str and pass through"""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value[:1] == ZLIB_MARKER:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    if value[:1] == RAW_MARKER:
+        return value[1:].decode('utf-8')
+    return value.decode('utf-8')
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed.
+
+    Values are compressed when written but returned from the database as
+    stored bytes; use CompressedAttribute on the model to decompress them
+    only when the attribute is actually read.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return compress_text(value)
+        return value
+
+
+class CompressedAttribute:
+    """Model attribute exposing a CompressedText column as text.
+
+    Decompresses on first access and memoizes the result until the
+    underlying column value changes (e.g. after a refresh). On the class
+    it returns the column attribute, so it works in queries and loader
+    options like ``load_only``.
+    """
+
+    def __init__(self, column_attr):
+        self.column_attr = column_attr
+        self.memo_key = column_attr + '_text'
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return getattr(owner, self.column_attr)
+        raw = getattr(obj, self.column_attr)
+        memo = obj.__dict__.get(self.memo_key)
+        if memo is not None and memo[0] is raw:
+            return memo[1]
+        value = decompress_text(raw)
+        obj.__dict__[self.memo_key] = (raw, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.column_attr, value)
@@ -3,18 +3,157 @@ from datetime import timedelta
 
 class Config:
     """Base configuration"""
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///wiki.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///wiki.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
     JSON_SORT_KEYS = False
+    JSON_FAST_ENCODER = True  # Uses orjson when installed, stdlib json otherwise
+    # Create the schema and seed data in create_app; production turns this
+    # off and runs it once per deployment (gunicorn on_starting or flask init-db)
+    INIT_DB_ON_STARTUP = True
 
     # Upload and download settings
     DOWNLOAD_FOLDER = 'downloads'
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size
 
-    # Create download folder if it doesn't exist
-    if not os.path.exists(DOWNLOAD_FOLDER):
-        os.makedirs(DOWNLOAD_FOLDER)
+    # Upstream MediaWiki API (None means https://en.wikipedia.org/w/api.php)
+    WIKIPEDIA_API_URL = os.environ.get('WIKIPEDIA_API_URL')
+    WIKIPEDIA_TIMEOUT = float(os.environ.get('WIKIPEDIA_TIMEOUT', '10'))
+    # 'live', 'record' (save upstream responses to the cassette) or
+    # 'replay' (serve only from the cassette, fully offline)
+    WIKIPEDIA_TRANSPORT = os.environ.get('WIKIPEDIA_TRANSPORT', 'live')
+    WIKIPEDIA_CASSETTE = os.environ.get('WIKIPEDIA_CASSETTE', 'cassettes/wikipedia.jsonl')
+    # Store every link of fetched articles in wikipedia_links (costs one
+    # extra upstream call per 500 links); otherwise only the first 15 are fetched
+    PERSIST_LINK_GRAPH = os.environ.get('PERSIST_LINK_GRAPH', '0') == '1'
+
+    # Prometheus metrics at /metrics. Set METRICS_DIR to a directory shared
+    # by all worker processes so any worker can report totals for all.
+    METRICS_ENABLED = True
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = 5  # seconds between per-worker snapshot writes
+
+    # Per-phase Server-Timing header on every response
+    SERVER_TIMING_ENABLED = True
+
+    # Admin endpoints (/admin/...) require this token in X-Admin-Token;
+    # they are disabled when it is not set
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+    # Request profiling: send 'X-Profile: 1' with the admin token, or
+    # sample a fraction of requests (optionally only PROFILE_ROUTES)
+    PROFILES_DIR = os.environ.get('PROFILES_DIR', 'profiles')
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_ROUTES = ['api_wikipedia_fetch', 'api_wikipedia_download_by_title']
+    PROFILE_MAX_FILES = 200
+
+    # Slow query log: statements slower than the threshold are written,
+    # with parameters, call site and query plan, to a rotating log file
+    # and kept in memory for /admin/slow-queries
+    SLOW_QUERY_LOG_ENABLED = True
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+    SLOW_QUERY_EXPLAIN = True
+    # Parameter values may hold API keys; by default only their count and types are logged
+    SLOW_QUERY_LOG_PARAMETERS = os.environ.get('SLOW_QUERY_LOG_PARAMETERS', '0') == '1'
+    SLOW_QUERY_BUFFER_SIZE = 200
+    SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE', 'logs/slow_queries.log')
+    SLOW_QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS = 3
+
+    # Memory profiling: tracemalloc can also be started at runtime through
+    # /admin/memory/tracemalloc. A non-zero interval logs RSS and top
+    # allocation sites from every worker periodically.
+    MEMORY_TRACEMALLOC = os.environ.get('MEMORY_TRACEMALLOC', '0') == '1'
+    MEMORY_TRACEMALLOC_FRAMES = 1
+    MEMORY_REPORT_INTERVAL = int(os.environ.get('MEMORY_REPORT_INTERVAL', '0'))  # seconds
+    MEMORY_REPORT_TOP = 10
+    MEMORY_MAX_SNAPSHOTS = 5
+
+    # Admission control for routes that call Wikipedia: per worker process,
+    # at most MAX_CONCURRENT run at once and MAX_QUEUE more wait up to
+    # QUEUE_TIMEOUT seconds; the rest get 503 with Retry-After. Together they
+    # must leave some of the worker's threads (GUNICORN_THREADS) free for
+    # cache-only routes, so the queue defaults to what RESERVED_THREADS leaves
+    ADMISSION_ENABLED = True
+    ADMISSION_WORKER_THREADS = int(os.environ.get('GUNICORN_THREADS', '8'))
+    ADMISSION_RESERVED_THREADS = 2
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT', '2'))
+    ADMISSION_MAX_QUEUE = int(os.environ.get(
+        'ADMISSION_MAX_QUEUE',
+        str(max(0, ADMISSION_WORKER_THREADS - ADMISSION_MAX_CONCURRENT - ADMISSION_RESERVED_THREADS))))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '2'))
+    ADMISSION_RETRY_AFTER = 5  # seconds
+    ADMISSION_ROUTES = ['api_wikipedia_search', 'api_wikipedia_fetch']
+
+    # Per-route time budgets in seconds. Clients may send their own budget
+    # in milliseconds in X-Request-Deadline-Ms (capped at the maximum).
+    # Upstream calls only get the time that is left; a fetch that runs out
+    # while loading categories/links returns a partial result.
+    REQUEST_DEADLINES = {
+        'api_wikipedia_search': 5.0,
+        'api_wikipedia_fetch': 10.0
+    }
+    REQUEST_DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+    REQUEST_DEADLINE_MAX = 30.0
+
+    # Circuit breaker around Wikipedia calls: opens after THRESHOLD
+    # consecutive failures, then lets one probe through every RESET_TIMEOUT
+    # seconds. While open, fetches serve cached copies or fail fast with 503.
+    CIRCUIT_BREAKER_ENABLED = True
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_BREAKER_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_BREAKER_RESET_TIMEOUT', '30'))
+
+    # Response compression (gzip, or brotli if the package is installed),
+    # negotiated from Accept-Encoding; bodies below the minimum are sent as is
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024  # bytes
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', '6'))  # gzip 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '5'))  # brotli 0-11
+
+    # Typo-tolerant lookup of cached titles before searching Wikipedia.
+    # Matches within AUTO_RESOLVE_DISTANCE edits are served from the cache
+    # (for queries of at least MIN_LENGTH characters); anything within
+    # MAX_DISTANCE is offered as a suggestion when Wikipedia has no page.
+    # MAX_DISTANCE 2 catches more typos but roughly doubles the memory.
+    FUZZY_LOOKUP_ENABLED = True
+    FUZZY_MAX_DISTANCE = int(os.environ.get('FUZZY_MAX_DISTANCE', '1'))
+    FUZZY_PREFIX_LENGTH = 7
+    FUZZY_AUTO_RESOLVE_DISTANCE = 1
+    FUZZY_MIN_LENGTH = 5
+
+    # Related articles: hashed word n-gram vectors of cached articles, scored
+    # with NumPy when installed. Memory is 4 * DIMENSIONS bytes per article.
+    RELATED_ENABLED = True
+    RELATED_DIMENSIONS = int(os.environ.get('RELATED_DIMENSIONS', '1024'))
+    RELATED_MAX_LIMIT = 50
+
+    # mode=vector on /api/wikipedia/cache/search (requires numpy): hashed
+    # character trigram vectors of cached articles, persisted in DIR and
+    # memory-mapped by every worker (4 * DIMENSIONS bytes per cached row)
+    VECTOR_SEARCH_ENABLED = True
+    VECTOR_SEARCH_DIR = os.environ.get('VECTOR_SEARCH_DIR', 'vector_index')
+    VECTOR_SEARCH_DIMENSIONS = int(os.environ.get('VECTOR_SEARCH_DIMENSIONS', '512'))
+    VECTOR_SEARCH_MAX_LIMIT = 100
+
+    # Rows fetched per database round trip when streaming NDJSON listings
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '500'))
+
+    # In-process JSON response cache (invalidated on commit)
+    RESPONSE_CACHE_MAX_ENTRIES = 512
+    RESPONSE_CACHE_TTL = 30  # seconds; bounds staleness across worker processes
+    RESPONSE_CACHE_ROUTES = [
+        'api_topics',
+        'api_search',
+        'api_topic_detail',
+        'api_topic_content',
+        'api_content_detail',
+        'api_stats',
+        'api_wikipedia_cached',
+        'api_wikipedia_cache_search',
+        'api_wikipedia_sections',
+        'api_wikipedia_section',
+        'api_wikipedia_related'
+    ]
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -30,6 +169,7 @@ class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     TESTING = False
+    INIT_DB_ON_STARTUP = os.environ.get('INIT_DB_ON_STARTUP', '0') == '1'
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,33 @@
+"""Shared pytest fixtures for the offline tests"""
+
+import pytest
+from app import create_app
+from circuit_breaker import upstream_breaker
+from config import config, TestingConfig
+from response_cache import response_cache
+
+FIXTURE_CONFIG = 'fixture_test'
+
+
+@pytest.fixture
+def make_client():
+    """Factory for ``(app, client, headers)`` built from TestingConfig plus ``settings``.
+
+    ``api_url`` becomes WIKIPEDIA_API_URL. Every app starts with an empty
+    response cache and a closed circuit breaker, and ``headers`` carries a
+    freshly generated API key. The config is registered for create_app
+    under a temporary name, removed again when the test ends.
+    """
+    def factory(api_url=None, **settings):
+        if api_url is not None:
+            settings['WIKIPEDIA_API_URL'] = api_url
+        config[FIXTURE_CONFIG] = type('FixtureTestConfig', (TestingConfig,), settings)
+        app = create_app(FIXTURE_CONFIG)
+        response_cache.clear()
+        upstream_breaker.reset()
+        client = app.test_client()
+        key = client.post('/api/keys/generate', json={'name': 'fixture test'}).get_json()['data']['key']
+        return app, client, {'X-API-Key': key}
+
+    yield factory
+    config.pop(FIXTURE_CONFIG, None)
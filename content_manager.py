@@ -1,5 +1,6 @@
-from database import db, Topic, Content
+from database import db, Topic, Content, BODY, load_fields
 from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
 
 class ContentManager:
     """Manages content retrieval and search operations"""
@@ -31,19 +32,21 @@ class ContentManager:
         ).order_by(Topic.name).all()
 
     @staticmethod
-    def get_content_by_topic_id(topic_id):
-        """Get all content for a specific topic"""
-        return Content.query.filter_by(topic_id=topic_id).order_by(Content.created_at).all()
+    def get_content_by_topic_id(topic_id, fields=None):
+        """Get all content for a specific topic, loading only the columns of ``fields``"""
+        return Content.query.options(load_fields(Content, fields)).filter_by(
+            topic_id=topic_id
+        ).order_by(Content.created_at).all()
 
     @staticmethod
-    def get_content_by_id(content_id):
-        """Get a specific content by ID"""
-        return Content.query.get(content_id)
+    def get_content_by_id(content_id, fields=None):
+        """Get a specific content by ID, loading only the columns of ``fields``"""
+        return Content.query.options(load_fields(Content, fields)).get(content_id)
 
     @staticmethod
     def get_topic_with_content(topic_id):
         """Get a topic with all its content"""
-        topic = Topic.query.get(topic_id)
+        topic = Topic.query.options(selectinload(Topic.content).undefer_group(BODY)).get(topic_id)
         if topic:
             topic_dict = topic.to_dict()
             topic_dict['content'] = [c.to_dict() for c in topic.content]
@@ -64,7 +67,7 @@ class ContentManager:
         ).all()
 
         # Search in content
-        content = Content.query.filter(
+        content = Content.query.options(load_fields(Content)).filter(
             or_(
                 Content.title.ilike(search_term),
                 Content.explanation.ilike(search_term)
@@ -1,10 +1,36 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import bindparam, column as sql_column, event, func, or_, select, table as sql_table, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import deferred, load_only, undefer_group
+from sqlalchemy.orm.attributes import flag_modified
 from datetime import datetime
+import json
 import os
 import secrets
+from serialization import dumps
+from compression import CompressedText, CompressedAttribute, compress_text
 
 db = SQLAlchemy()
 
+# Large text columns are deferred in this group: they are only loaded
+# (together, in one query) when one of them is accessed or the query
+# asks for them with load_fields()
+BODY = 'body'
+
+
+def requested_fields(all_fields, fields=None):
+    """The fields of ``all_fields`` to serialize, in order (all when ``fields`` is None)"""
+    if fields is None:
+        return all_fields
+    return [field for field in all_fields if field in fields]
+
+
+def load_fields(model, fields=None):
+    """Loader option for rows that will be serialized with ``to_dict(fields)``"""
+    if fields is None:
+        return undefer_group(BODY)
+    return load_only(model.id, *(getattr(model, field) for field in requested_fields(model.FIELDS, fields)))
+
 class Topic(db.Model):
     """Topic model"""
     __tablename__ = 'topics'
@@ -20,13 +46,15 @@ class Topic(db.Model):
     def __repr__(self):
         return f'<Topic {self.name}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'created_at': self.created_at.isoformat()
-        }
+    FIELDS = ('id', 'name', 'description', 'created_at')
+
+    def to_dict(self, fields=None):
+        """Serialize all fields, or only ``fields``"""
+        data = {}
+        for field in requested_fields(self.FIELDS, fields):
+            value = getattr(self, field)
+            data[field] = value.isoformat() if field == 'created_at' else value
+        return data
 
 class APIKey(db.Model):
     """API Key model for Wikipedia access"""
@@ -66,29 +94,146 @@ class WikipediaContent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     topic_name = db.Column(db.String(255), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
-    content = db.Column(db.Text, nullable=False)
     url = db.Column(db.String(512), nullable=True)
-    summary = db.Column(db.Text, nullable=True)
-    categories = db.Column(db.Text, nullable=True)  # JSON stored as text
-    references = db.Column(db.Text, nullable=True)  # JSON stored as text
     fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Large text columns are stored compressed and decompressed on first read
+    _content = deferred(db.Column('content', CompressedText, nullable=False), group=BODY)
+    _summary = db.Column('summary', CompressedText, nullable=True)
+    _categories = deferred(db.Column('categories', CompressedText, nullable=True), group=BODY)  # JSON stored as text
+    _references = deferred(db.Column('references', CompressedText, nullable=True), group=BODY)  # JSON stored as text
+    _payload = deferred(db.Column('payload', CompressedText, nullable=True), group=BODY)  # Pre-serialized to_dict() without 'id'
+    content = CompressedAttribute('_content')
+    summary = CompressedAttribute('_summary')
+    categories = CompressedAttribute('_categories')
+    references = CompressedAttribute('_references')
+    payload = CompressedAttribute('_payload')
+
+    # Relationship
+    sections = db.relationship('WikipediaSection', back_populates='content',
+                               cascade='all, delete-orphan', order_by='WikipediaSection.position')
     
     def __repr__(self):
         return f'<WikipediaContent {self.title}>'
     
-    def to_dict(self):
-        import json
-        return {
-            'id': self.id,
-            'topic_name': self.topic_name,
+    FIELDS = ('id', 'topic_name', 'title', 'content', 'url', 'summary', 'categories', 'references', 'fetched_at')
+
+    def to_dict(self, fields=None):
+        """Serialize all fields, or only ``fields`` (other deferred columns are left unloaded)"""
+        data = {}
+        for field in requested_fields(self.FIELDS, fields):
+            value = getattr(self, field)
+            if field in ('categories', 'references'):
+                value = json.loads(value) if value else []
+            elif field == 'fetched_at':
+                value = value.isoformat()
+            data[field] = value
+        return data
+
+    def build_payload(self):
+        """Serialize the response fields once, at write time"""
+        # categories/references are already JSON text, so splice them in as-is
+        return (
+            '{"topic_name":' + dumps(self.topic_name) +
+            ',"title":' + dumps(self.title) +
+            ',"content":' + dumps(self.content) +
+            ',"url":' + dumps(self.url) +
+            ',"summary":' + dumps(self.summary) +
+            ',"categories":' + (self.categories or '[]') +
+            ',"references":' + (self.references or '[]') +
+            ',"fetched_at":' + dumps(self.fetched_at.isoformat()) + '}'
+        )
+
+    def to_json(self):
+        """Get the to_dict() representation as a JSON string without re-encoding"""
+        payload = self.payload or self.build_payload()
+        return '{"id":' + str(self.id) + ',' + payload[1:]
+
+
+@event.listens_for(WikipediaContent, 'before_insert')
+@event.listens_for(WikipediaContent, 'before_update')
+def _refresh_wikipedia_payload(mapper, connection, target):
+    """Keep the pre-serialized payload in step with the row"""
+    if target.fetched_at is None:
+        target.fetched_at = datetime.utcnow()
+    target.payload = target.build_payload()
+
+class WikipediaSection(db.Model):
+    """One section of a cached Wikipedia article, in document order.
+
+    ``offset`` and ``length`` locate the section body within the full
+    article text (as returned by wikipediaapi's ``page.text``).
+    """
+    __tablename__ = 'wikipedia_sections'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('wikipedia_content.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(512), nullable=False)
+    level = db.Column(db.Integer, nullable=False)
+    offset = db.Column(db.Integer, nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+    _text = db.Column('text', CompressedText, nullable=False)
+    text = CompressedAttribute('_text')
+
+    # Relationship
+    content = db.relationship('WikipediaContent', back_populates='sections')
+
+    def __repr__(self):
+        return f'<WikipediaSection {self.position}: {self.title}>'
+
+    def to_dict(self, include_text=True):
+        data = {
+            'position': self.position,
             'title': self.title,
-            'content': self.content,
-            'url': self.url,
-            'summary': self.summary,
-            'categories': json.loads(self.categories) if self.categories else [],
-            'references': json.loads(self.references) if self.references else [],
-            'fetched_at': self.fetched_at.isoformat()
+            'level': self.level,
+            'offset': self.offset,
+            'length': self.length
         }
+        if include_text:
+            data['text'] = self.text
+        return data
+
+class WikipediaLink(db.Model):
+    """Edge of the link graph: ``source_title`` links to ``target_title``.
+
+    Filled with the complete link list of fetched articles when
+    PERSIST_LINK_GRAPH is enabled, so related-topic lookups don't have to
+    ask Wikipedia again.
+    """
+    __tablename__ = 'wikipedia_links'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_title = db.Column(db.String(512), nullable=False, index=True)
+    target_title = db.Column(db.String(512), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<WikipediaLink {self.source_title} -> {self.target_title}>'
+
+class WikipediaAlias(db.Model):
+    """Maps a normalized title, query or redirect source to its canonical article title.
+
+    ``source`` records where the mapping came from: ``query`` (what a
+    user asked for), ``redirect`` (a redirect reported by Wikipedia),
+    ``title`` (the canonical title itself) or ``fuzzy`` (a misspelling
+    Wikipedia has no page for, corrected to a cached title).
+    """
+    __tablename__ = 'wikipedia_aliases'
+
+    id = db.Column(db.Integer, primary_key=True)
+    alias = db.Column(db.String(512), nullable=False, unique=True, index=True)
+    title = db.Column(db.String(512), nullable=False, index=True)
+    source = db.Column(db.String(20), nullable=False, default='query')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<WikipediaAlias {self.alias} -> {self.title}>'
+
+    @staticmethod
+    def normalize(value):
+        """Lookup key for a title or query: case-folded, underscores as spaces, whitespace collapsed"""
+        return ' '.join(value.replace('_', ' ').split()).casefold()
 
 class Content(db.Model):
     """Content model"""
@@ -97,8 +242,8 @@ class Content(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
-    explanation = db.Column(db.Text, nullable=False)
-    code_examples = db.Column(db.Text, nullable=True)
+    explanation = deferred(db.Column(db.Text, nullable=False), group=BODY)
+    code_examples = deferred(db.Column(db.Text, nullable=True), group=BODY)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationship
@@ -108,15 +253,15 @@ class Content(db.Model):
     def __repr__(self):
         return f'<Content {self.title}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'topic_id': self.topic_id,
-            'title': self.title,
-            'explanation': self.explanation,
-            'code_examples': self.code_examples,
-            'created_at': self.created_at.isoformat()
-        }
+    FIELDS = ('id', 'topic_id', 'title', 'explanation', 'code_examples', 'created_at')
+
+    def to_dict(self, fields=None):
+        """Serialize all fields, or only ``fields`` (other deferred columns are left unloaded)"""
+        data = {}
+        for field in requested_fields(self.FIELDS, fields):
+            value = getattr(self, field)
+            data[field] = value.isoformat() if field == 'created_at' else value
+        return data
 
 class Download(db.Model):
     """Download tracking model"""
@@ -143,10 +288,162 @@ class Download(db.Model):
             'file_name': self.file_name
         }
 
+class SchemaMigration(db.Model):
+    """A one-off data migration that has been applied to this database"""
+    __tablename__ = 'schema_migrations'
+
+    name = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.name}>'
+
+    @staticmethod
+    def applied(name):
+        return db.session.get(SchemaMigration, name) is not None
+
+    @staticmethod
+    def record(name):
+        db.session.add(SchemaMigration(name=name))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker ran the same migration at the same time
+            db.session.rollback()
+
 def init_db(app):
     """Initialize the database"""
     with app.app_context():
         db.create_all()
+        migrate_db(app)
+
+def migrate_db(app):
+    """Add columns introduced after a table was first created, and fill in derived ones"""
+    with app.app_context():
+        inspector = db.inspect(db.engine)
+        quote = db.engine.dialect.identifier_preparer.quote
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                db.session.execute(text(
+                    f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}'
+                ))
+        db.session.commit()
+        if not SchemaMigration.applied(PAYLOAD_MIGRATION):
+            backfill_payloads()
+            SchemaMigration.record(PAYLOAD_MIGRATION)
+
+PAYLOAD_MIGRATION = 'backfill_payloads'
+
+def backfill_payloads(batch_size=500):
+    """Pre-serialize the payload of rows cached before the payload column was added"""
+    last_id = 0
+    while True:
+        rows = WikipediaContent.query.options(undefer_group(BODY)).filter(
+            WikipediaContent.id > last_id, WikipediaContent.payload.is_(None)
+        ).order_by(WikipediaContent.id).limit(batch_size).all()
+        if not rows:
+            break
+        for item in rows:
+            # Marking the row dirty is enough: the before_update hook builds the payload
+            flag_modified(item, '_payload')
+        last_id = rows[-1].id
+        db.session.commit()
+
+COMPRESS_MIGRATION = 'compress_text_columns'
+
+def compress_legacy_rows(batch_size=500):
+    """Compress CompressedText values written before compression was added.
+
+    A one-off migration (``flask --app wsgi compress-legacy-rows``),
+    recorded in ``schema_migrations``; returns False if it already ran.
+    SQLite keeps TEXT and BLOB values side by side in a column, so only
+    the TEXT values are rewritten. Other databases need the column type
+    changed: the values are copied, compressed, into a new binary column
+    that then replaces the old one.
+    """
+    if SchemaMigration.applied(COMPRESS_MIGRATION):
+        return False
+    inspector = db.inspect(db.engine)
+    sqlite = db.engine.dialect.name == 'sqlite'
+    for table in db.metadata.sorted_tables:
+        columns = [column for column in table.columns if isinstance(column.type, CompressedText)]
+        if not columns or not inspector.has_table(table.name):
+            continue
+        if sqlite:
+            _compress_text_values(table, columns, batch_size)
+            continue
+        stored_types = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+        for column in columns:
+            if not _is_binary(stored_types[column.name]):
+                _convert_to_binary(table, column, batch_size)
+    SchemaMigration.record(COMPRESS_MIGRATION)
+    return True
+
+def _compress_text_values(table, columns, batch_size):
+    """Rewrite the TEXT values of SQLite columns that also hold compressed BLOBs"""
+    query = select(table.c.id, *columns).where(or_(*(func.typeof(column) == 'text' for column in columns)))
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            query.where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            # Plain strings are compressed by CompressedText when bound
+            legacy = {column.name: value for column, value in zip(columns, row[1:]) if isinstance(value, str)}
+            if legacy:
+                db.session.execute(table.update().where(table.c.id == row[0]).values(legacy))
+        last_id = rows[-1][0]
+        db.session.commit()
+
+def _is_binary(column_type):
+    try:
+        return column_type.python_type is bytes
+    except NotImplementedError:
+        return False
+
+def _convert_to_binary(table, column, batch_size):
+    """Replace a text column with a binary one holding its values compressed"""
+    quote = db.engine.dialect.identifier_preparer.quote
+    dialect = db.engine.dialect.name
+    name = column.name
+    temporary = name + '_compressed'
+    binary_type = column.type.compile(dialect=db.engine.dialect)
+    table_name = quote(table.name)
+    db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {quote(temporary)} {binary_type}'))
+    db.session.commit()
+
+    # Untyped columns: the old one is read as stored text, the new one written as is
+    stored = sql_table(table.name, sql_column('id'), sql_column(name), sql_column(temporary))
+    update = stored.update().where(stored.c.id == bindparam('row_id')).values({temporary: bindparam('value')})
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(stored.c.id, stored.c[name]).where(stored.c.id > last_id).order_by(stored.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        values = [{'row_id': row_id, 'value': compress_text(value)} for row_id, value in rows if value is not None]
+        if values:
+            db.session.execute(update, values)
+        last_id = rows[-1][0]
+        db.session.commit()
+
+    db.session.execute(text(f'ALTER TABLE {table_name} DROP COLUMN {quote(name)}'))
+    db.session.execute(text(f'ALTER TABLE {table_name} RENAME COLUMN {quote(temporary)} TO {quote(name)}'))
+    if not column.nullable:
+        if dialect == 'postgresql':
+            db.session.execute(text(f'ALTER TABLE {table_name} ALTER COLUMN {quote(name)} SET NOT NULL'))
+        elif dialect in ('mysql', 'mariadb'):
+            db.session.execute(text(f'ALTER TABLE {table_name} MODIFY {quote(name)} {binary_type} NOT NULL'))
+    db.session.commit()
 
 def seed_db(app):
     """Seed the database with sample data"""
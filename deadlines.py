@@ -0,0 +1,66 @@
+import time
+from flask import g, has_request_context, request
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's time budget has run out"""
+
+
+class Deadline:
+    """Absolute point in time by which a request should have finished"""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        """Seconds left (never negative)"""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self):
+        return self.clock() >= self.expires_at
+
+    def check(self):
+        """Raise DeadlineExceeded if the budget is spent"""
+        if self.expired():
+            raise DeadlineExceeded(f'Request deadline of {self.seconds:.3f}s exceeded')
+
+
+def current():
+    """Deadline of the current request, if it has one"""
+    if has_request_context():
+        return g.get('request_deadline')
+    return None
+
+
+def parse_header(value, maximum):
+    """Deadline in seconds from a header value in milliseconds (None if invalid)"""
+    try:
+        millis = float(value)
+    except (TypeError, ValueError):
+        return None
+    if millis <= 0:
+        return None
+    return min(millis / 1000.0, maximum)
+
+
+def init_app(app):
+    """Start a deadline for requests to routes with a budget in REQUEST_DEADLINES.
+
+    Clients may set their own budget in milliseconds with the header named
+    by REQUEST_DEADLINE_HEADER, capped at REQUEST_DEADLINE_MAX seconds.
+    The deadline starts before admission control, so time spent queueing
+    for an upstream slot counts against it.
+    """
+    budgets = app.config.get('REQUEST_DEADLINES', {})
+    header = app.config.get('REQUEST_DEADLINE_HEADER', 'X-Request-Deadline-Ms')
+    maximum = app.config.get('REQUEST_DEADLINE_MAX', 30.0)
+
+    @app.before_request
+    def _start_deadline():
+        seconds = budgets.get(request.endpoint)
+        if seconds is None:
+            return
+        requested = parse_header(request.headers.get(header), maximum)
+        g.request_deadline = Deadline(requested if requested is not None else seconds)
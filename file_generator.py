@@ -1,7 +1,21 @@
 import os
+import functools
 from datetime import datetime
-from fpdf import FPDF
 from pathlib import Path
+from metrics import metrics
+import server_timing
+
+
+def timed_render(format_type, source):
+    """Record a FileGenerator method's render time by output format and per request"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with metrics.timer('file_render_duration_seconds', format=format_type, source=source), \
+                    server_timing.phase('render'):
+                return method(*args, **kwargs)
+        return wrapper
+    return decorator
 
 class FileGenerator:
     """Generates files in different formats (PDF, Text, Markdown)"""
@@ -17,11 +31,13 @@ class FileGenerator:
         safe_name = ''.join(c for c in safe_name if c.isalnum() or c in '_-')
         return f"{safe_name}.{format_type}"
 
+    @timed_render('pdf', 'topic')
     def generate_pdf(self, topic_name, content):
         """Generate PDF file"""
         filename = self.generate_filename(topic_name, content['title'], 'pdf')
         filepath = os.path.join(self.download_folder, filename)
 
+        from fpdf import FPDF  # Imported lazily; only PDF downloads need it
         pdf = FPDF()
         pdf.add_page()
 
@@ -57,6 +73,7 @@ class FileGenerator:
         pdf.output(filepath)
         return filename, filepath
 
+    @timed_render('text', 'topic')
     def generate_text(self, topic_name, content):
         """Generate plain text file"""
         filename = self.generate_filename(topic_name, content['title'], 'txt')
@@ -87,6 +104,7 @@ class FileGenerator:
 
         return filename, filepath
 
+    @timed_render('markdown', 'topic')
     def generate_markdown(self, topic_name, content):
         """Generate Markdown file"""
         filename = self.generate_filename(topic_name, content['title'], 'md')
@@ -123,12 +141,14 @@ class FileGenerator:
         else:
             raise ValueError(f"Unsupported format: {format_type}")
     
+    @timed_render('pdf', 'wikipedia')
     def generate_pdf_from_wikipedia(self, title, content, url):
         """Generate PDF from Wikipedia content"""
         filename = self.generate_filename(title, title, 'pdf')
         filepath = os.path.join(self.download_folder, filename)
 
         try:
+            from fpdf import FPDF
             pdf = FPDF('P', 'mm', 'A4')
             pdf.add_page()
             pdf.set_margins(10, 10, 10)
@@ -187,6 +207,7 @@ class FileGenerator:
             # Create text version as fallback
             return self.generate_text_from_wikipedia(title, content, url)
     
+    @timed_render('markdown', 'wikipedia')
     def generate_markdown_from_wikipedia(self, title, content, url):
         """Generate Markdown from Wikipedia content"""
         filename = self.generate_filename(title, title, 'md')
@@ -201,6 +222,7 @@ class FileGenerator:
 
         return filename, filepath
     
+    @timed_render('text', 'wikipedia')
     def generate_text_from_wikipedia(self, title, content, url):
         """Generate plain text from Wikipedia content"""
         filename = self.generate_filename(title, title, 'txt')
@@ -0,0 +1,68 @@
+"""Gunicorn settings for multi-worker deployments.
+
+The app is imported once in the master (preload_app) and forked into the
+workers, and the database schema and seed data are set up once in the
+on_starting hook instead of in every worker. The related-article, title and
+vector indexes are loaded before the workers take requests: in the master
+with preload_app, so the workers inherit them, otherwise in each worker.
+"""
+
+import os
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# Threads let cache-only requests run while other threads wait on Wikipedia;
+# admission control (admission.py) caps how many of them may do so, and
+# create_app refuses a limit that could take up every thread
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# Workers share metric snapshots through this directory (see metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'wiki-fetcher-metrics'))
+
+
+def on_starting(server):
+    """Create the schema and seed data once, before any worker starts"""
+    from app import create_app, setup_database
+    from config import config
+    from metrics import clear_metrics_dir
+
+    clear_metrics_dir(os.environ['METRICS_DIR'])
+
+    config_name = os.environ.get('FLASK_ENV', 'production')
+    if getattr(config[config_name], 'INIT_DB_ON_STARTUP', True):
+        return  # Each app instance already initializes the database itself
+    setup_database(create_app(config_name))
+
+
+def when_ready(server):
+    """Load the indexes once in the master, before it forks the workers"""
+    if not server.cfg.preload_app:
+        return
+    from app import warm_indexes
+
+    warm_indexes(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    """Without preload_app, load the indexes in each worker before it accepts requests"""
+    if worker.cfg.preload_app:
+        return
+    from app import warm_indexes
+
+    warm_indexes(worker.wsgi)
+
+
+def post_fork(server, worker):
+    """Don't share pooled DB connections or metric counts inherited from the master"""
+    from metrics import metrics
+
+    metrics.reset()
+    if not server.cfg.preload_app:
+        return
+    from database import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
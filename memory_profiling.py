@@ -0,0 +1,180 @@
+import gc
+import itertools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+logger = logging.getLogger('wiki.memory')
+
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+def current_rss():
+    """Resident set size of this process in bytes (None if unavailable)"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def _format_stat(stat):
+    frame = stat.traceback[0]
+    return {
+        'location': f'{frame.filename}:{frame.lineno}',
+        'size_bytes': stat.size,
+        'count': stat.count
+    }
+
+
+def _format_diff(stat):
+    frame = stat.traceback[0]
+    return {
+        'location': f'{frame.filename}:{frame.lineno}',
+        'size_bytes': stat.size,
+        'size_diff_bytes': stat.size_diff,
+        'count': stat.count,
+        'count_diff': stat.count_diff
+    }
+
+
+class MemoryMonitor:
+    """tracemalloc snapshots/diffs and periodic RSS reports for a worker.
+
+    Tracing can be started and stopped at runtime from the admin
+    endpoints, so a live worker can be inspected without a restart.
+    Snapshots are kept per worker process.
+    """
+
+    def __init__(self):
+        self.report_interval = 0
+        self.top = 10
+        self.frames = 1
+        self.max_snapshots = 5
+        self.snapshots = OrderedDict()
+        self._lock = threading.Lock()
+        self._reporter_pid = None
+        self._snapshot_ids = itertools.count(1)
+
+    def init_app(self, app):
+        self.report_interval = app.config.get('MEMORY_REPORT_INTERVAL', 0)
+        self.top = app.config.get('MEMORY_REPORT_TOP', self.top)
+        self.frames = app.config.get('MEMORY_TRACEMALLOC_FRAMES', self.frames)
+        self.max_snapshots = app.config.get('MEMORY_MAX_SNAPSHOTS', self.max_snapshots)
+        app.extensions['memory_monitor'] = self
+
+        if app.config.get('MEMORY_TRACEMALLOC') and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+        if self.report_interval:
+            if not logger.handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter('%(asctime)s [memory] %(message)s'))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+
+            @app.before_request
+            def _ensure_memory_reporter():
+                # Started lazily so that each forked worker gets its own thread
+                if self._reporter_pid != os.getpid():
+                    self.start_reporter()
+
+    def start_tracing(self, frames=None):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self.frames)
+
+    def stop_tracing(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+
+    def status(self, top=None):
+        """Current memory usage of this worker"""
+        info = {
+            'pid': os.getpid(),
+            'rss_bytes': current_rss(),
+            'gc_counts': gc.get_count(),
+            'gc_objects': len(gc.get_objects()),
+            'tracemalloc': tracemalloc.is_tracing(),
+            'snapshots': list(self.snapshots)
+        }
+        if tracemalloc.is_tracing():
+            traced, peak = tracemalloc.get_traced_memory()
+            info['traced_bytes'] = traced
+            info['traced_peak_bytes'] = peak
+            info['top_allocations'] = self.top_allocations(top)
+        return info
+
+    def take_snapshot(self):
+        """Take and store a snapshot; returns its id"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('tracemalloc is not tracing')
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        snapshot_id = time.strftime('%Y%m%d_%H%M%S') + f'_{os.getpid()}_{next(self._snapshot_ids)}'
+        with self._lock:
+            self.snapshots[snapshot_id] = snapshot
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top_allocations(self, top=None, key_type='lineno'):
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        return [_format_stat(stat) for stat in snapshot.statistics(key_type)[:top or self.top]]
+
+    def diff(self, since=None, top=None, key_type='lineno'):
+        """Compare the current heap with a stored snapshot (the latest by default)"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('tracemalloc is not tracing')
+        with self._lock:
+            if not self.snapshots:
+                raise KeyError('No snapshot has been taken yet')
+            since = since or next(reversed(self.snapshots))
+            baseline = self.snapshots[since]
+        current = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        stats = current.compare_to(baseline, key_type)
+        return since, [_format_diff(stat) for stat in stats[:top or self.top]]
+
+    def report(self):
+        """Log RSS and (when tracing) the top allocation sites"""
+        rss = current_rss()
+        message = f'pid={os.getpid()} rss_mb={rss / 1048576:.1f}' if rss else f'pid={os.getpid()} rss=unknown'
+        if tracemalloc.is_tracing():
+            traced, peak = tracemalloc.get_traced_memory()
+            top = ', '.join(f"{s['location']}={s['size_bytes'] // 1024}KiB" for s in self.top_allocations())
+            message += f' traced_mb={traced / 1048576:.1f} peak_mb={peak / 1048576:.1f} top=[{top}]'
+        logger.info(message)
+
+    def start_reporter(self):
+        """Start the periodic reporting thread for this process"""
+        self._reporter_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(self.report_interval)
+                try:
+                    self.report()
+                except Exception:
+                    logger.exception('Memory report failed')
+
+        threading.Thread(target=run, name='memory-reporter', daemon=True).start()
+
+
+memory_monitor = MemoryMonitor()
@@ -0,0 +1,238 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+import query_timing
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'HTTP requests by route, method and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by route'),
+    'wikipedia_upstream_requests_total': ('counter', 'Calls to the MediaWiki API by query module and outcome'),
+    'wikipedia_upstream_request_duration_seconds': ('histogram', 'MediaWiki API call latency by query module'),
+    'response_cache_lookups_total': ('counter', 'Response cache lookups by route and result (hit/miss/stale)'),
+    'file_render_duration_seconds': ('histogram', 'FileGenerator render time by format'),
+    'api_key_validation_duration_seconds': ('histogram', 'Time spent validating API keys'),
+    'db_queries_total': ('counter', 'Database queries by statement type'),
+    'db_query_duration_seconds': ('histogram', 'Database query latency by statement type'),
+    'admission_wait_seconds': ('histogram', 'Time upstream-bound requests waited for an admission slot'),
+    'admission_rejected_total': ('counter', 'Upstream-bound requests shed with 503 by route and reason'),
+    'circuit_breaker_transitions_total': ('counter', 'Circuit breaker state changes by breaker and new state'),
+    'circuit_breaker_rejected_total': ('counter', 'Calls refused while a circuit breaker was open'),
+    'http_response_compressed_total': ('counter', 'Compressed responses by encoding and whether the bytes came from the response cache'),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+class Metrics:
+    """Cheap in-process metrics registry with Prometheus text exposition.
+
+    Each process keeps its own counters and histograms in memory. When
+    ``METRICS_DIR`` is set, every process periodically writes a snapshot to
+    ``<dir>/metrics_<pid>.json`` and the ``/metrics`` endpoint sums the
+    snapshots of all processes, so any gunicorn worker can answer a scrape
+    for the whole server.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = True
+        self.buckets = buckets
+        self.directory = None
+        self.flush_interval = 5.0
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def init_app(self, app):
+        """Configure from the app config and register request hooks"""
+        from flask import g, request
+
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.directory = app.config.get('METRICS_DIR')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval)
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        query_timing.subscribe(_record_query)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self.flush)
+
+        @app.before_request
+        def _start_request_timer():
+            g.metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            start = g.pop('metrics_start', None)
+            if start is not None:
+                route = request.endpoint or 'unmatched'
+                self.inc('http_requests_total', route=route, method=request.method,
+                         status=str(response.status_code))
+                self.observe('http_request_duration_seconds', time.perf_counter() - start,
+                             route=route, method=request.method)
+            self.maybe_flush()
+            return response
+
+    def inc(self, name, value=1, **labels):
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, value, **labels):
+        """Record an observation (in seconds) in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of a block in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """Get this process's metrics in a JSON-serializable form"""
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(values)]
+                               for (name, labels), values in self._histograms.items()]
+            }
+
+    def maybe_flush(self):
+        """Write this process's snapshot if the flush interval has passed"""
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write this process's snapshot to the shared metrics directory"""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f'metrics_{os.getpid()}.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Merge the snapshots of every process into (counters, histograms)"""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            own_file = f'metrics_{os.getpid()}.json'
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+                if os.path.basename(path) == own_file:
+                    continue
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # Being rewritten or removed; picked up next scrape
+
+        counters = defaultdict(float)
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                counters[(name, tuple(tuple(pair) for pair in labels))] += value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+        return counters, histograms
+
+    def render(self):
+        """Render all processes' metrics in the Prometheus text format"""
+        counters, histograms = self.collect()
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described and name in HELP:
+                kind, text = HELP[name]
+                lines.append(f'# HELP {name} {text}')
+                lines.append(f'# TYPE {name} {kind}')
+            described.add(name)
+
+        for (name, labels), value in sorted(counters.items()):
+            describe(name)
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for (name, labels), values in sorted(histograms.items()):
+            describe(name)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, le=repr(bound))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {values[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {values[-1]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Clear this process's metrics"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def clear_metrics_dir(directory):
+    """Remove snapshots left by a previous server run"""
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json*')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+metrics = Metrics()
+
+
+def _record_query(conn, cursor, statement, parameters, executemany, elapsed):
+    """Count and time every SQL statement"""
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+    metrics.inc('db_queries_total', statement=kind)
+    metrics.observe('db_query_duration_seconds', elapsed, statement=kind)
@@ -0,0 +1,115 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import time
+import uuid
+from flask import g, request
+from admin import is_admin_request
+
+
+class RequestProfiler:
+    """Runs selected requests under cProfile and saves the stats to disk.
+
+    A request is profiled when it carries ``X-Profile: 1`` together with a
+    valid ``X-Admin-Token``, or when it is picked by PROFILE_SAMPLE_RATE
+    (optionally limited to the endpoints in PROFILE_ROUTES). Both can be
+    used on live workers without restarting them.
+    """
+
+    def __init__(self):
+        self.directory = 'profiles'
+        self.sample_rate = 0.0
+        self.routes = None
+        self.max_files = 200
+
+    def init_app(self, app):
+        self.directory = app.config.get('PROFILES_DIR', self.directory)
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', self.sample_rate)
+        self.routes = set(app.config.get('PROFILE_ROUTES') or ()) or None
+        self.max_files = app.config.get('PROFILE_MAX_FILES', self.max_files)
+        app.extensions['profiler'] = self
+
+        @app.before_request
+        def _start_profiler():
+            if self.should_profile():
+                g.profiler = cProfile.Profile()
+                g.profiler.enable()
+
+        @app.after_request
+        def _save_profile(response):
+            profiler = g.pop('profiler', None)
+            if profiler is not None:
+                profiler.disable()
+                response.headers['X-Profile-Id'] = self.save(profiler, request.endpoint)
+            return response
+
+        @app.teardown_request
+        def _stop_profiler(exc):
+            profiler = g.pop('profiler', None)
+            if profiler is not None:
+                profiler.disable()
+
+    def should_profile(self):
+        """Decide whether the current request is profiled"""
+        if request.headers.get('X-Profile') == '1' and is_admin_request():
+            return True
+        if self.sample_rate <= 0:
+            return False
+        if self.routes is not None and request.endpoint not in self.routes:
+            return False
+        return random.random() < self.sample_rate
+
+    def save(self, profiler, endpoint):
+        """Write profiler stats to the profiles directory and return the file name"""
+        os.makedirs(self.directory, exist_ok=True)
+        name = '{}_{}_{}_{}.prof'.format(
+            time.strftime('%Y%m%d_%H%M%S'), endpoint or 'unmatched', os.getpid(), uuid.uuid4().hex[:8]
+        )
+        profiler.dump_stats(os.path.join(self.directory, name))
+        self.prune()
+        return name
+
+    def prune(self):
+        """Keep only the newest max_files profiles"""
+        files = self.list_profiles()
+        for stale in files[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, stale['name']))
+            except OSError:
+                pass
+
+    def list_profiles(self):
+        """List saved profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.prof'):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            profiles.append({
+                'name': name,
+                'size': stat.st_size,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stat.st_mtime))
+            })
+        profiles.sort(key=lambda p: p['name'], reverse=True)
+        return profiles
+
+    def path_for(self, name):
+        """Get the path of a saved profile, or None if it doesn't exist"""
+        if os.path.basename(name) != name or not name.endswith('.prof'):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def summary(path, sort='cumulative', limit=40):
+        """Render a saved profile as a pstats text report"""
+        stream = io.StringIO()
+        pstats.Stats(path, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+request_profiler = RequestProfiler()
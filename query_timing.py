@@ -0,0 +1,45 @@
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_subscribers = []
+_hooks_registered = False
+
+
+def subscribe(callback):
+    """Call ``callback(conn, cursor, statement, parameters, executemany, elapsed)`` after every SQL statement.
+
+    Every statement on every engine is timed once, by one set of engine
+    listeners, and the elapsed seconds go to all subscribers (metrics,
+    Server-Timing and the slow query log) in the order they subscribed.
+    Subscribing the same callback again has no effect.
+    """
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+    _register_hooks()
+
+
+def _register_hooks():
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    _hooks_registered = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_timing_start', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _publish(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_timing_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        for callback in _subscribers:
+            callback(conn, cursor, statement, parameters, executemany, elapsed)
+
+    @event.listens_for(Engine, 'handle_error')
+    def _discard_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_timing_start'):
+            connection.info['query_timing_start'].pop()
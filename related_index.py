@@ -0,0 +1,165 @@
+import math
+import re
+import threading
+import zlib
+from flask import has_app_context
+from database import WikipediaContent, load_fields
+
+try:
+    import numpy
+except ImportError:  # optional, scored in pure Python without it
+    numpy = None
+
+WORD = re.compile(r'[^\W\d_]{3,}')
+
+STOPWORDS = frozenset('''
+    about above after again against also among and any are because been before being below between
+    both but can could did does doing down during each few for from further had has have having her
+    here hers him his how into its itself just more most much not now off once only other our ours
+    out over own same she should some such than that the their theirs them then there these they
+    this those through too under until very was were what when where which while who whom why will
+    with would you your yours
+'''.split())
+
+
+def word_ngrams(text):
+    """Lowercased words of three letters or more (minus stopwords), and adjacent word pairs"""
+    words = [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+    return words + [first + ' ' + second for first, second in zip(words, words[1:])]
+
+
+def hashed_vector(terms, dimensions):
+    """Sparse unit vector ``{index: weight}`` of hashed, log-scaled term counts.
+
+    crc32 keeps the hashing identical in every process. Half the terms
+    count negatively so that colliding terms tend to cancel out instead
+    of adding up.
+    """
+    counts = {}
+    for term in terms:
+        code = zlib.crc32(term.encode('utf-8'))
+        index = code % dimensions
+        counts[index] = counts.get(index, 0.0) + (1.0 if code & 0x80000000 else -1.0)
+    vector = {index: math.copysign(math.log1p(abs(count)), count)
+              for index, count in counts.items() if count}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {index: weight / norm for index, weight in vector.items()} if norm else {}
+
+
+class RelatedIndex:
+    """Related cached articles by cosine similarity of hashed word n-gram vectors.
+
+    Each cached article (the latest copy per title) is one unit vector of
+    ``dimensions`` hashed word and word-pair counts of its summary and
+    content. With NumPy the vectors are rows of a float32 matrix and a
+    lookup scores every article with a single matrix-vector product;
+    without it, sparse vectors are scored one by one in Python.
+
+    The index lives in each worker process. ``refresh`` adds the rows
+    cached since the last refresh, by any worker, so articles are added
+    incrementally instead of rebuilding the matrix.
+    """
+
+    def __init__(self, dimensions=1024):
+        self.enabled = True
+        self.dimensions = dimensions
+        self.titles = []  # row -> title
+        self.rows = {}  # title -> row
+        self.matrix = None
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the index from the application config"""
+        self.enabled = app.config.get('RELATED_ENABLED', True)
+        self.dimensions = app.config.get('RELATED_DIMENSIONS', self.dimensions)
+        app.extensions['related_index'] = self
+        self.clear()
+
+    def add(self, title, text):
+        """Index (or re-index) an article"""
+        vector = hashed_vector(word_ngrams(text), self.dimensions)
+        row = self.rows.get(title)
+        if row is None:
+            row = len(self.titles)
+            self._grow(row + 1)
+            self.titles.append(title)
+            self.rows[title] = row
+        self._set(row, vector)
+
+    def _grow(self, size):
+        if numpy is None:
+            if self.matrix is None:
+                self.matrix = []
+            self.matrix.extend({} for _ in range(size - len(self.matrix)))
+        elif self.matrix is None or len(self.matrix) < size:
+            # Double the capacity so adding articles one at a time stays cheap
+            capacity = max(64, size, 2 * (0 if self.matrix is None else len(self.matrix)))
+            matrix = numpy.zeros((capacity, self.dimensions), dtype=numpy.float32)
+            if self.matrix is not None:
+                matrix[:len(self.matrix)] = self.matrix
+            self.matrix = matrix
+
+    def _set(self, row, vector):
+        if numpy is None:
+            self.matrix[row] = vector
+            return
+        self.matrix[row] = 0.0
+        if vector:
+            self.matrix[row, list(vector)] = list(vector.values())
+
+    def refresh(self):
+        """Add the articles cached since the last refresh"""
+        if not has_app_context():
+            return
+        with self._lock:
+            rows = WikipediaContent.query.options(
+                load_fields(WikipediaContent, ('title', 'summary', 'content'))
+            ).filter(WikipediaContent.id > self.last_id).order_by(WikipediaContent.id)
+            for item in rows.yield_per(200):
+                self.add(item.title, (item.summary or '') + '\n' + (item.content or ''))
+                self.last_id = item.id
+
+    def related(self, title, limit=10):
+        """Most similar other articles as (title, score), best first; None if the title isn't indexed"""
+        if not self.enabled:
+            return None
+        self.refresh()
+        with self._lock:
+            row = self.rows.get(title)
+            if row is None:
+                return None
+            size = len(self.titles)
+            if numpy is None:
+                scores = self._python_scores(self.matrix[row], size)
+            else:
+                scores = self.matrix[:size] @ self.matrix[row]
+        return self._top(scores, row, limit)
+
+    def _python_scores(self, vector, size):
+        return [sum(weight * other.get(index, 0.0) for index, weight in vector.items())
+                for other in self.matrix[:size]]
+
+    def _top(self, scores, row, limit):
+        if numpy is None:
+            ranked = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        else:
+            scores[row] = -numpy.inf
+            count = min(limit, len(scores) - 1)
+            if count <= 0:
+                return []
+            candidates = numpy.argpartition(-scores, count - 1)[:count]
+            ranked = candidates[numpy.argsort(-scores[candidates])]
+        return [(self.titles[index], round(float(scores[index]), 4))
+                for index in ranked if index != row and scores[index] > 0][:limit]
+
+    def clear(self):
+        """Forget every article; the next refresh reloads them all"""
+        with self._lock:
+            self.titles = []
+            self.rows = {}
+            self.matrix = None
+            self.last_id = 0
+
+
+related_index = RelatedIndex()
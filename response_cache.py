@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request, jsonify, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from metrics import metrics
+
+
+class ResponseCache:
+    """Bounded in-process LRU cache of serialized JSON API responses"""
+
+    def __init__(self, max_entries=512, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled_routes = set()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the cache from the application config"""
+        self.max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+        self.enabled_routes = set(app.config.get('RESPONSE_CACHE_ROUTES', ()))
+        app.extensions['response_cache'] = self
+        _register_session_hooks()
+
+    def is_enabled(self, route):
+        """Check whether a route has opted in to response caching"""
+        return self.max_entries > 0 and route in self.enabled_routes
+
+    @staticmethod
+    def make_key(route, params):
+        """Build a cache key from the route name and its parameters"""
+        return (route, tuple(sorted(params)))
+
+    def get(self, key):
+        """Return a cached entry and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                result = 'miss'
+            elif self.ttl and time.monotonic() - entry['stored_at'] > self.ttl:
+                del self._entries[key]
+                entry = None
+                result = 'stale'
+            else:
+                result = 'hit'
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.inc('response_cache_lookups_total', route=key[0], result=result)
+        return entry
+
+    def set(self, key, body, status, models):
+        """Store a serialized response body tagged with the tables it depends on"""
+        tables = frozenset(model.__tablename__ for model in models)
+        entry = {
+            'body': body,
+            'status': status,
+            'tables': tables,
+            'stored_at': time.monotonic(),
+            'encoded': {}  # compressed bodies by Content-Encoding, filled on demand
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, tables):
+        """Drop every entry that depends on any of the given tables"""
+        if not tables:
+            return 0
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry['tables'] & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        """Remove all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get hit/miss counters for the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'routes': sorted(self.enabled_routes)
+            }
+
+    def cached_json(self, route, models, builder):
+        """Serve a JSON response for the current request from the cache.
+
+        ``builder`` is called on a miss and returns ``(payload, status)``;
+        the payload may be a dict or an already-serialized JSON string.
+        Only successful responses are stored.
+        """
+        if not self.is_enabled(route):
+            payload, status = builder()
+            if isinstance(payload, str):
+                return Response(payload, status=status, mimetype='application/json')
+            return jsonify(payload), status
+
+        params = [(k, v) for k, v in request.args.items(multi=True) if k != 'api_key']
+        params.extend((k, str(v)) for k, v in (request.view_args or {}).items())
+        key = self.make_key(route, params)
+
+        entry = self.get(key)
+        if entry is None:
+            payload, status = builder()
+            body = payload if isinstance(payload, str) else current_app.json.dumps(payload)
+            response = Response(body, status=status, mimetype='application/json')
+            if status == 200:
+                # Lets response compression reuse the entry's compressed bodies
+                response.cache_entry = self.set(key, body, status, models)
+            return response
+
+        response = Response(entry['body'], status=entry['status'], mimetype='application/json')
+        response.cache_entry = entry
+        return response
+
+
+response_cache = ResponseCache()
+
+_hooks_registered = False
+
+
+def _register_session_hooks():
+    """Invalidate cached responses when a commit touches their tables"""
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    _hooks_registered = True
+
+    @event.listens_for(Session, 'after_flush')
+    def _collect_changed_tables(session, flush_context):
+        changed = session.info.setdefault('response_cache_tables', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            table = getattr(obj, '__tablename__', None)
+            if table:
+                changed.add(table)
+
+    @event.listens_for(Session, 'after_commit')
+    def _invalidate_on_commit(session):
+        changed = session.info.pop('response_cache_tables', None)
+        if changed:
+            response_cache.invalidate(frozenset(changed))
+
+    @event.listens_for(Session, 'after_rollback')
+    def _discard_on_rollback(session):
+        session.info.pop('response_cache_tables', None)
@@ -0,0 +1,89 @@
+import gzip
+from flask import request
+from metrics import metrics
+import server_timing
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+DEFAULT_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/html', 'text/plain',
+                     'text/css', 'text/javascript', 'application/javascript')
+
+
+class ResponseCompressor:
+    """Compresses responses with gzip, or brotli when installed and preferred by the client.
+
+    The encoding is negotiated from Accept-Encoding. Responses smaller
+    than ``min_size``, streamed or file responses, and responses that are
+    already encoded are sent as they are. For responses served by the
+    response cache the compressed bytes are stored on the cache entry, so
+    hot payloads are compressed once per encoding, not on every request.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 5
+        self.mimetypes = frozenset(DEFAULT_MIMETYPES)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.level = app.config.get('COMPRESS_LEVEL', self.level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        self.mimetypes = frozenset(app.config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES))
+        app.extensions['response_compressor'] = self
+        if not self.enabled:
+            return
+
+        @app.after_request
+        def _compress_response(response):
+            return self.compress_response(response)
+
+    def encodings(self):
+        """Encodings this server can produce, in order of preference"""
+        return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def negotiate(self):
+        """Pick an encoding from the request's Accept-Encoding (None for identity)"""
+        return request.accept_encodings.best_match(self.encodings())
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress_response(self, response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.mimetype not in self.mimetypes
+                or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code in (204, 206, 304)):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        with server_timing.phase('compress'):
+            entry = getattr(response, 'cache_entry', None)
+            encoded = entry['encoded'].get(encoding) if entry is not None else None
+            cached = encoded is not None
+            if encoded is None:
+                encoded = self.compress(data, encoding)
+                if entry is not None:
+                    entry['encoded'][encoding] = encoded
+
+        metrics.inc('http_response_compressed_total', encoding=encoding, cached=str(cached).lower())
+        response.set_data(encoded)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+response_compressor = ResponseCompressor()
@@ -0,0 +1,66 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+import server_timing
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+
+def dumps(obj):
+    """Serialize an object to a compact JSON string, using orjson if installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def json_list(items):
+    """Join already-serialized JSON documents into a JSON array string"""
+    with server_timing.phase('serialize'):
+        return '[' + ','.join(items) + ']'
+
+
+def parse_fields(value, allowed):
+    """Parse a sparse fieldset (comma-separated string or list) against the allowed fields.
+
+    Returns None when no fieldset was given, meaning all fields. Raises
+    ValueError naming any unknown fields, when the fieldset is empty
+    (``fields=``), which would otherwise return empty objects, or when it
+    is neither a string nor a list (e.g. ``{"fields": 5}`` in a JSON body).
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, (list, tuple)):
+        raise ValueError('fields must be a comma-separated string or a list of field names')
+    fields = frozenset(str(field).strip() for field in value if str(field).strip())
+    if not fields:
+        raise ValueError(f"No fields requested; omit fields to get all of them. Allowed: {', '.join(allowed)}")
+    unknown = sorted(fields.difference(allowed))
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return fields
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that times serialization and can use orjson.
+
+    With ``fast`` set (JSON_FAST_ENCODER) and orjson installed, encoding is
+    done by orjson; otherwise it falls back to the stdlib encoder.
+    """
+
+    fast = True
+
+    def dumps(self, obj, **kwargs):
+        with server_timing.phase('serialize'):
+            if not self.fast or orjson is None or kwargs:
+                return super().dumps(obj, **kwargs)
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+            except TypeError:
+                return super().dumps(obj)
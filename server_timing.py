@@ -0,0 +1,72 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import g, has_request_context
+import query_timing
+
+# Phases reported in the Server-Timing header, in display order
+PHASES = {
+    'auth': 'API key validation',
+    'db': 'Database queries',
+    'upstream': 'Wikipedia API calls',
+    'format': 'Content formatting',
+    'render': 'File rendering',
+    'serialize': 'JSON serialization',
+    'compress': 'Response compression',
+}
+
+
+def record(name, seconds):
+    """Add time to a phase of the current request (no-op outside requests)"""
+    if has_request_context():
+        timings = g.get('server_timing')
+        if timings is not None:
+            timings[name] += seconds
+
+
+@contextmanager
+def phase(name):
+    """Time a block as part of a phase of the current request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def header_value(timings, total):
+    """Build a Server-Timing header value from phase durations in seconds"""
+    entries = [
+        f'{name};dur={timings[name] * 1000:.2f};desc="{desc}"'
+        for name, desc in PHASES.items() if name in timings
+    ]
+    entries.append(f'total;dur={total * 1000:.2f};desc="Total"')
+    return ', '.join(entries)
+
+
+def init_app(app):
+    """Add a Server-Timing header with a per-phase breakdown to every response.
+
+    Phases can overlap: 'db' includes the queries made while validating
+    the API key, for example, and 'total' covers the whole request.
+    """
+    if not app.config.get('SERVER_TIMING_ENABLED', True):
+        return
+    query_timing.subscribe(_record_query)
+
+    @app.before_request
+    def _start_server_timing():
+        g.server_timing = defaultdict(float)
+        g.server_timing_start = time.perf_counter()
+
+    @app.after_request
+    def _add_server_timing_header(response):
+        timings = g.pop('server_timing', None)
+        start = g.pop('server_timing_start', None)
+        if timings is not None and start is not None:
+            response.headers['Server-Timing'] = header_value(timings, time.perf_counter() - start)
+        return response
+
+
+def _record_query(conn, cursor, statement, parameters, executemany, elapsed):
+    record('db', elapsed)
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+import query_timing
+
+MODULE_FILE = os.path.abspath(__file__)
+# Frames in these files belong to the logging itself, not the code that issued the query
+INTERNAL_FILES = {MODULE_FILE, os.path.abspath(query_timing.__file__)}
+REPO_ROOT = os.path.dirname(MODULE_FILE)
+
+
+class SlowQueryLog:
+    """Records SQL statements slower than a threshold.
+
+    Each entry carries the statement, its parameters, the application call
+    site that issued it and, for SELECTs, the database's query plan
+    (``EXPLAIN QUERY PLAN`` on SQLite). Entries go to a rotating log file
+    and to an in-memory buffer served by /admin/slow-queries. Parameter
+    values (API keys among them) are only logged with ``log_parameters``;
+    otherwise an entry shows their count and types.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 0.1
+        self.explain = True
+        self.log_parameters = False
+        self.entries = deque(maxlen=200)
+        self.logger = logging.getLogger('wiki.slow_queries')
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SLOW_QUERY_LOG_ENABLED', True)
+        self.threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100) / 1000.0
+        self.explain = app.config.get('SLOW_QUERY_EXPLAIN', True)
+        self.log_parameters = app.config.get('SLOW_QUERY_LOG_PARAMETERS', False)
+        self.entries = deque(self.entries, maxlen=app.config.get('SLOW_QUERY_BUFFER_SIZE', 200))
+        app.extensions['slow_query_log'] = self
+        if not self.enabled:
+            return
+
+        log_file = app.config.get('SLOW_QUERY_LOG_FILE')
+        if log_file and not self.logger.handlers:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                log_file,
+                maxBytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024),
+                backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 3)
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+        query_timing.subscribe(self._check_duration)
+
+    def _check_duration(self, conn, cursor, statement, parameters, executemany, elapsed):
+        if self.enabled and elapsed >= self.threshold:
+            self.record(conn, cursor, statement, parameters, executemany, elapsed)
+
+    def record(self, conn, cursor, statement, parameters, executemany, elapsed):
+        """Store and log a slow statement"""
+        if self.log_parameters:
+            logged_parameters = _truncate(repr(parameters), 500)
+        else:
+            logged_parameters = _redact(parameters, executemany)
+        entry = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duration_ms': round(elapsed * 1000, 3),
+            'statement': statement,
+            'parameters': logged_parameters,
+            'call_site': _call_site(),
+            'plan': None,
+            'pid': os.getpid()
+        }
+        if self.explain and not executemany and statement.lstrip().upper().startswith('SELECT'):
+            entry['plan'] = _explain(conn, cursor, statement, parameters)
+
+        with self._lock:
+            self.entries.append(entry)
+        self.logger.info(json.dumps(entry))
+
+    def recent(self, limit=None):
+        """Get recorded slow queries, newest first"""
+        with self._lock:
+            entries = list(self.entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+def _truncate(text, length):
+    return text if len(text) <= length else text[:length] + '...'
+
+
+def _redact(parameters, executemany):
+    """Count and types of a statement's parameters, without their values"""
+    rows = list(parameters or ()) if executemany else [parameters or ()]
+    first = rows[0] if rows else ()
+    if isinstance(first, dict):
+        types = {key: type(value).__name__ for key, value in first.items()}
+    else:
+        types = [type(value).__name__ for value in first]
+    redacted = {'count': len(first), 'types': types}
+    if executemany:
+        redacted['rows'] = len(rows)
+    return redacted
+
+
+def _call_site():
+    """Application frames (outside this module and third-party code) that issued the query"""
+    frames = []
+    for frame in traceback.extract_stack()[:-3]:
+        filename = os.path.abspath(frame.filename)
+        if not filename.startswith(REPO_ROOT) or 'site-packages' in filename or filename in INTERNAL_FILES:
+            continue
+        frames.append(f'{os.path.relpath(filename, REPO_ROOT)}:{frame.lineno} in {frame.name}')
+    return frames[-5:]
+
+
+def _explain(conn, cursor, statement, parameters):
+    """Fetch the query plan through the raw DBAPI connection (bypassing engine events)"""
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            return [' | '.join(str(col) for col in row) for row in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
+
+
+slow_query_log = SlowQueryLog()
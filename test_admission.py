@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Test admission control against a slow stub Wikipedia (offline)"""
+
+import threading
+import time
+import pytest
+from config import TestingConfig
+from admission import admission
+from benchmarks.stub_wikipedia import StubWikipedia, StubWikipediaServer
+
+
+def wait_until(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_limits_must_leave_a_free_thread(make_client):
+    with pytest.raises(ValueError):
+        make_client('http://127.0.0.1:9/w/api.php', ADMISSION_WORKER_THREADS=4,
+                    ADMISSION_MAX_CONCURRENT=2, ADMISSION_MAX_QUEUE=2)
+
+
+def test_default_limits_leave_threads_for_cache_routes():
+    assert (TestingConfig.ADMISSION_MAX_CONCURRENT + TestingConfig.ADMISSION_MAX_QUEUE
+            < TestingConfig.ADMISSION_WORKER_THREADS)
+
+
+def test_cache_route_answers_while_upstream_is_saturated(make_client):
+    with StubWikipediaServer(StubWikipedia(latency_ms=400)) as server:
+        app, client, headers = make_client(
+            server.url, ADMISSION_WORKER_THREADS=4, ADMISSION_MAX_CONCURRENT=1,
+            ADMISSION_MAX_QUEUE=1, ADMISSION_QUEUE_TIMEOUT=10)
+        statuses = []
+
+        def fetch(topic):
+            statuses.append(client.post('/api/wikipedia/fetch', json={'topic': topic},
+                                        headers=headers).status_code)
+
+        # One request holds the upstream slot and one waits: with the four
+        # threads a worker would have, two are still free for everything else
+        workers = [threading.Thread(target=fetch, args=(topic,))
+                   for topic in ('Machine learning', 'Database')]
+        for worker in workers:
+            worker.start()
+        assert wait_until(lambda: admission.stats()['active'] == 1 and admission.stats()['waiting'] == 1)
+
+        start = time.perf_counter()
+        topics = client.get('/api/topics')
+        assert topics.status_code == 200
+        assert time.perf_counter() - start < 0.3
+
+        shed = client.post('/api/wikipedia/fetch', json={'topic': 'Algorithm'}, headers=headers)
+        assert shed.status_code == 503
+        assert shed.headers['Retry-After'] == str(app.config['ADMISSION_RETRY_AFTER'])
+        ready = client.get('/ready')
+        assert ready.status_code == 503
+        assert ready.get_json()['admission']['queue_full'] is True
+
+        for worker in workers:
+            worker.join()
+        assert statuses == [200, 200]
+        assert client.get('/ready').status_code == 200
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("ADMISSION CONTROL TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Test that known aliases and redirects are answered from the cache (offline)"""
+
+import os
+import tempfile
+import pytest
+from cassette import Cassette
+from database import db, WikipediaAlias, WikipediaContent
+from benchmarks.stub_wikipedia import StubWikipedia, StubWikipediaServer
+from response_cache import response_cache
+
+
+def test_aliases_are_served_from_the_cache(make_client):
+    stub = StubWikipedia()
+    with StubWikipediaServer(stub) as server:
+        app, client, headers = make_client(server.url)
+        fetched = client.post('/api/wikipedia/fetch', json={'topic': 'ML'}, headers=headers).get_json()
+        assert fetched['title'] == 'Machine learning'
+        with app.app_context():
+            aliases = {row.alias: (row.title, row.source) for row in WikipediaAlias.query}
+        assert aliases['ml'] == ('Machine learning', 'redirect')
+        assert aliases['machine learning'] == ('Machine learning', 'title')
+
+        requests_before = stub.request_count
+        for topic in ('ML', 'machine learning', '  Machine   Learning '):
+            result = client.post('/api/wikipedia/search', json={'topic': topic}, headers=headers).get_json()
+            assert result['title'] == 'Machine learning'
+            assert result['cached'] is True
+        assert stub.request_count == requests_before
+
+
+def test_record_requests_the_topic_as_given(make_client):
+    with StubWikipediaServer(StubWikipedia()) as server, tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'wikipedia.jsonl')
+        app, client, headers = make_client(server.url, WIKIPEDIA_TRANSPORT='record', WIKIPEDIA_CASSETTE=path)
+        assert client.post('/api/wikipedia/fetch', json={'topic': 'ML'}, headers=headers).status_code == 200
+        recorded = set(Cassette(path).interactions)
+
+        # Uncached again but still a known alias: a live fetch would ask for
+        # "Machine learning" first, a request a replay of this cassette could not answer
+        with app.app_context():
+            WikipediaContent.query.delete()
+            db.session.commit()
+            assert WikipediaAlias.query.filter_by(alias='ml').count() == 1
+        response_cache.clear()
+        assert client.post('/api/wikipedia/fetch', json={'topic': 'ML'}, headers=headers).status_code == 200
+        assert set(Cassette(path).interactions) == recorded
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("ALIAS TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
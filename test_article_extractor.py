@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Test single-pass article extraction against wikipediaapi's text layout (offline)"""
+
+from article_extractor import extract_article
+
+
+class FakeSection:
+    def __init__(self, title, text='', sections=(), level=0):
+        self.title = title
+        self.text = text
+        self.level = level
+        self.sections = [FakeSection(sub.title, sub.text, sub.sections, level + 1) for sub in sections]
+
+    def full_text(self):
+        # Same layout as wikipediaapi's WikipediaPageSection.full_text
+        text = self.title + '\n' + self.text
+        if self.text:
+            text += '\n\n'
+        return text + ''.join(section.full_text() for section in self.sections)
+
+
+class FakePage:
+    def __init__(self, summary, sections):
+        self.title = 'Fake'
+        self.summary = summary
+        self.sections = sections
+
+    @property
+    def text(self):
+        # Same layout as wikipediaapi's WikipediaPage.text
+        text = self.summary + '\n\n' if self.summary else ''
+        return (text + ''.join(section.full_text() for section in self.sections)).strip()
+
+
+def assert_sections_located(page):
+    article = extract_article(page)
+    assert article.text == page.text
+    for row in article.sections:
+        assert article.text[row['offset']:row['offset'] + row['length']] == row['text']
+    return article
+
+
+def test_nested_sections():
+    page = FakePage('Intro.', [
+        FakeSection('History', 'Early days.', [FakeSection('Origins', 'First.'), FakeSection('Empty')]),
+        FakeSection('Usage', 'Widely used.')
+    ])
+    article = assert_sections_located(page)
+    assert [row['title'] for row in article.sections] == ['History', 'Origins', 'Empty', 'Usage']
+    assert [row['level'] for row in article.sections] == [0, 1, 1, 0]
+
+
+def test_last_section_with_trailing_whitespace():
+    page = FakePage('Intro.', [FakeSection('Only', 'Body text.\n\n  ')])
+    article = assert_sections_located(page)
+    assert article.sections[-1]['text'] == 'Body text.'
+
+
+def test_summary_with_leading_whitespace():
+    page = FakePage('\n  Intro.', [FakeSection('One', 'First.'), FakeSection('Two', 'Second.')])
+    article = assert_sections_located(page)
+    assert [row['text'] for row in article.sections] == ['First.', 'Second.']
+
+
+def test_no_summary_and_empty_last_section():
+    page = FakePage('', [FakeSection('One', 'First.'), FakeSection('Two')])
+    assert_sections_located(page)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("ARTICLE EXTRACTOR TEST")
+    print("=" * 60)
+    for test in (test_nested_sections,
+                 test_last_section_with_trailing_whitespace,
+                 test_summary_with_leading_whitespace,
+                 test_no_summary_and_empty_last_section):
+        test()
+        print(f"✓ {test.__name__}")
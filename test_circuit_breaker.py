@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Test the upstream circuit breaker, alone and against the stub Wikipedia (offline)"""
+
+import time
+from urllib.parse import urlparse
+import pytest
+import requests
+from circuit_breaker import (CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN,
+                             is_upstream_failure, upstream_breaker)
+from benchmarks.stub_wikipedia import StubWikipedia, StubWikipediaServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(threshold=3, reset_timeout=30):
+    clock = FakeClock()
+    return CircuitBreaker('test', failure_threshold=threshold, reset_timeout=reset_timeout, clock=clock), clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_closed_open_half_open_closed():
+    breaker, clock = make_breaker()
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_success()
+    assert breaker.failures == 0  # only consecutive failures count
+
+    open_breaker(breaker)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 30
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 1
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.retry_after() == 0
+
+
+def test_failed_probe_reopens():
+    breaker, clock = make_breaker()
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == 30
+
+
+def test_single_probe_while_half_open():
+    breaker, clock = make_breaker()
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    rejected = breaker.rejected
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == rejected + 1
+    assert breaker.state == HALF_OPEN
+
+
+def test_cancelled_probe_frees_the_slot():
+    breaker, clock = make_breaker()
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_cancelled()
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # a new probe is let through
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_upstream_failures():
+    def http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    assert is_upstream_failure(requests.ConnectionError())
+    assert is_upstream_failure(requests.Timeout())
+    assert is_upstream_failure(http_error(503))
+    assert is_upstream_failure(http_error(429))
+    assert not is_upstream_failure(http_error(404))
+
+
+def test_open_circuit_serves_stale_or_503(make_client):
+    clock = FakeClock()
+    server = StubWikipediaServer(StubWikipedia()).start()
+    port = urlparse(server.url).port
+    app, client, headers = make_client(server.url, CIRCUIT_BREAKER_FAILURE_THRESHOLD=2,
+                                       CIRCUIT_BREAKER_RESET_TIMEOUT=30)
+    upstream_breaker.clock = clock
+    try:
+        fresh = client.post('/api/wikipedia/fetch', json={'topic': 'Machine learning'}, headers=headers)
+        assert fresh.status_code == 200
+        assert 'stale' not in fresh.get_json()
+
+        # Wikipedia goes away: two failed fetches open the circuit
+        server.stop()
+        for topic in ('Database', 'Algorithm'):
+            client.post('/api/wikipedia/fetch', json={'topic': topic}, headers=headers)
+        assert upstream_breaker.state == OPEN
+        assert client.get('/ready').get_json()['upstream']['state'] == OPEN
+
+        stale = client.post('/api/wikipedia/fetch', json={'topic': 'Machine learning'}, headers=headers)
+        assert stale.status_code == 200
+        assert stale.get_json()['stale'] is True
+        assert stale.get_json()['title'] == 'Machine learning'
+
+        refused = client.post('/api/wikipedia/fetch', json={'topic': 'Database'}, headers=headers)
+        assert refused.status_code == 503
+        assert refused.headers['Retry-After'] == '30'
+        assert refused.get_json()['upstream_unavailable'] is True
+
+        # Back up, and the reset timeout has passed: the probe closes the circuit
+        server = StubWikipediaServer(StubWikipedia(), port=port).start()
+        clock.now += 30
+        recovered = client.post('/api/wikipedia/fetch', json={'topic': 'Database'}, headers=headers)
+        assert recovered.status_code == 200
+        assert 'stale' not in recovered.get_json()
+        assert upstream_breaker.state == CLOSED
+    finally:
+        server.stop()
+        upstream_breaker.reset()
+        upstream_breaker.clock = time.monotonic
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("CIRCUIT BREAKER TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
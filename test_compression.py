@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test compressed text columns and the legacy row migration (offline)"""
+
+from sqlalchemy import text
+from app import create_app
+from database import db, WikipediaContent, SchemaMigration, COMPRESS_MIGRATION, compress_legacy_rows, _convert_to_binary
+
+LONG_TEXT = 'Compressed article body é. ' * 40
+SHORT_TEXT = 'raw summary'
+
+
+def make_app():
+    return create_app('testing')
+
+
+def insert_legacy_row(title):
+    """A row as written before compression: plain TEXT values"""
+    db.session.execute(text(
+        'INSERT INTO wikipedia_content (topic_name, title, content, summary) '
+        'VALUES (:title, :title, :content, :summary)'
+    ), {'title': title, 'content': LONG_TEXT, 'summary': SHORT_TEXT})
+    db.session.commit()
+    return db.session.execute(text('SELECT id FROM wikipedia_content WHERE title = :title'),
+                              {'title': title}).scalar()
+
+
+def stored_types(row_id):
+    return db.session.execute(text(
+        'SELECT typeof(content), typeof(summary) FROM wikipedia_content WHERE id = :id'
+    ), {'id': row_id}).one()
+
+
+def read_back(row_id):
+    db.session.expunge_all()
+    item = db.session.get(WikipediaContent, row_id)
+    return item.content, item.summary
+
+
+def test_compressed_row_round_trip():
+    app = make_app()
+    with app.app_context():
+        item = WikipediaContent(topic_name='New', title='New', content=LONG_TEXT, summary=SHORT_TEXT)
+        db.session.add(item)
+        db.session.commit()
+        assert stored_types(item.id) == ('blob', 'blob')
+        assert read_back(item.id) == (LONG_TEXT, SHORT_TEXT)
+
+
+def test_legacy_rows_are_read_then_compressed_once():
+    app = make_app()
+    with app.app_context():
+        legacy_id = insert_legacy_row('Legacy')
+        assert stored_types(legacy_id) == ('text', 'text')
+        assert read_back(legacy_id) == (LONG_TEXT, SHORT_TEXT)
+
+        assert compress_legacy_rows(batch_size=1) is True
+        assert stored_types(legacy_id) == ('blob', 'blob')
+        assert read_back(legacy_id) == (LONG_TEXT, SHORT_TEXT)
+        assert SchemaMigration.applied(COMPRESS_MIGRATION)
+
+        # Recorded: later legacy rows are left alone
+        later_id = insert_legacy_row('Later')
+        assert compress_legacy_rows() is False
+        assert stored_types(later_id) == ('text', 'text')
+
+
+def test_text_column_converted_to_binary():
+    app = make_app()
+    with app.app_context():
+        legacy_id = insert_legacy_row('Converted')
+        table = WikipediaContent.__table__
+        _convert_to_binary(table, table.c.summary, batch_size=1)
+        columns = {column['name']: column for column in db.inspect(db.engine).get_columns(table.name)}
+        assert 'summary_compressed' not in columns
+        assert columns['summary']['type'].python_type is bytes
+        assert stored_types(legacy_id)[1] == 'blob'
+        assert read_back(legacy_id) == (LONG_TEXT, SHORT_TEXT)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("COMPRESSION TEST")
+    print("=" * 60)
+    for test in (test_compressed_row_round_trip,
+                 test_legacy_rows_are_read_then_compressed_once,
+                 test_text_column_converted_to_binary):
+        test()
+        print(f"✓ {test.__name__}")
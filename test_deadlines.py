@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Test request deadlines against a slow stub Wikipedia (offline)"""
+
+import time
+import pytest
+from database import WikipediaContent
+from circuit_breaker import upstream_breaker, CLOSED
+from deadlines import Deadline, DeadlineExceeded, parse_header
+from benchmarks.stub_wikipedia import StubWikipedia, StubWikipediaServer
+
+
+class SlowListsStub(StubWikipedia):
+    """Answers page info and text at once but links and categories slowly"""
+
+    def __init__(self, lists_latency_ms):
+        super().__init__()
+        self.lists_latency_ms = lists_latency_ms
+
+    def handle(self, params):
+        props = params.get('prop', '').split('|')
+        if 'links' in props or 'categories' in props:
+            time.sleep(self.lists_latency_ms / 1000.0)
+        return super().handle(params)
+
+
+def cached_count(app):
+    with app.app_context():
+        return WikipediaContent.query.count()
+
+
+def test_parse_header():
+    assert parse_header('250', 30.0) == 0.25
+    assert parse_header('1.5', 30.0) == 0.0015
+    assert parse_header('60000', 30.0) == 30.0  # capped
+    for value in (None, '', 'soon', '0', '-5'):
+        assert parse_header(value, 30.0) is None
+
+
+def test_deadline_runs_out():
+    now = [100.0]
+    deadline = Deadline(2.0, clock=lambda: now[0])
+    assert deadline.remaining() == 2.0
+    deadline.check()
+    now[0] += 2.5
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+
+
+def test_slow_upstream_gets_504(make_client):
+    with StubWikipediaServer(StubWikipedia(latency_ms=400)) as server:
+        app, client, headers = make_client(server.url)
+        start = time.perf_counter()
+        response = client.post('/api/wikipedia/fetch', json={'topic': 'Database'},
+                               headers=dict(headers, **{'X-Request-Deadline-Ms': '100'}))
+        assert response.status_code == 504
+        assert response.get_json()['deadline_exceeded'] is True
+        assert time.perf_counter() - start < 0.4
+        assert cached_count(app) == 0
+        # Running out of time says nothing about Wikipedia's health
+        assert upstream_breaker.state == CLOSED
+        assert upstream_breaker.failures == 0
+
+
+def test_partial_result_when_lists_run_out_of_time(make_client):
+    with StubWikipediaServer(SlowListsStub(lists_latency_ms=600)) as server:
+        app, client, headers = make_client(server.url)
+        response = client.post('/api/wikipedia/fetch', json={'topic': 'Database'},
+                               headers=dict(headers, **{'X-Request-Deadline-Ms': '300'}))
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result['partial'] is True
+        assert result['title'] == 'Database'
+        assert result['full_text']
+        assert result['categories'] == [] and result['references'] == []
+        assert cached_count(app) == 0  # partial results are not cached
+
+
+def test_default_budget_without_header(make_client):
+    with StubWikipediaServer(SlowListsStub(lists_latency_ms=300)) as server:
+        app, client, headers = make_client(server.url)
+        response = client.post('/api/wikipedia/fetch', json={'topic': 'Database'}, headers=headers)
+        assert response.status_code == 200
+        result = response.get_json()
+        assert 'partial' not in result
+        assert result['categories'] and result['references']
+        assert cached_count(app) == 1
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("REQUEST DEADLINE TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Test related articles ranked by the related index, against the stub Wikipedia (offline)"""
+
+import pytest
+from benchmarks.stub_wikipedia import StubWikipedia, StubWikipediaServer, make_page
+
+EXTRACTS = {
+    'Python (programming language)': 'Python is a dynamically typed programming language. Programmers write '
+                                     'Python scripts with an interpreter and a large standard library.',
+    'Java (programming language)': 'Java is a statically typed programming language. Programmers compile '
+                                   'Java classes to bytecode for a virtual machine and a large standard library.',
+    'Machine learning': 'Machine learning trains statistical models on training data. Neural networks with '
+                        'many layers learn to predict labels from training data.',
+    'Neural network': 'A neural network is layers of artificial neurons. Neural networks learn weights from '
+                      'training data, and deep layers of neurons make deep learning models.',
+    'Database': 'A database stores records in tables. Queries select rows, transactions keep records '
+                'consistent and indexes make queries over tables fast.',
+    'Deep learning': 'Deep learning trains neural networks with many deep layers of neurons on large '
+                     'amounts of training data.',
+}
+
+CACHED = ('Python (programming language)', 'Java (programming language)', 'Machine learning',
+          'Neural network', 'Database')
+
+
+def make_stub():
+    pages = []
+    for title, extract in EXTRACTS.items():
+        page = make_page(title, sections=0, links=5, categories=2)
+        page['extract'] = extract
+        pages.append(page)
+    return StubWikipedia(pages)
+
+
+def cache_articles(client, headers):
+    for title in CACHED:
+        assert client.post('/api/wikipedia/fetch', json={'topic': title}, headers=headers).status_code == 200
+
+
+def related(client, headers, title, query=''):
+    return client.get(f'/api/wikipedia/{title}/related{query}', headers=headers)
+
+
+def test_ranking(make_client):
+    with StubWikipediaServer(make_stub()) as server:
+        app, client, headers = make_client(server.url)
+        cache_articles(client, headers)
+        result = related(client, headers, 'Python (programming language)').get_json()
+        assert result['title'] == 'Python (programming language)'
+        assert result['data'][0]['title'] == 'Java (programming language)'
+        scores = [row['score'] for row in result['data']]
+        assert scores == sorted(scores, reverse=True)
+        assert 'Python (programming language)' not in [row['title'] for row in result['data']]
+
+        result = related(client, headers, 'Machine learning').get_json()
+        assert result['data'][0]['title'] == 'Neural network'
+
+
+def test_unknown_title(make_client):
+    with StubWikipediaServer(make_stub()) as server:
+        app, client, headers = make_client(server.url)
+        cache_articles(client, headers)
+        response = related(client, headers, 'Quantum computing')
+        assert response.status_code == 404
+        assert response.get_json()['success'] is False
+        assert related(client, {}, 'Database').status_code == 401
+
+
+def test_limit_bounds(make_client):
+    with StubWikipediaServer(make_stub()) as server:
+        app, client, headers = make_client(server.url, RELATED_MAX_LIMIT=3)
+        cache_articles(client, headers)
+        assert related(client, headers, 'Database', '?limit=1').get_json()['count'] == 1
+        for limit in ('0', '-5'):
+            assert related(client, headers, 'Database', f'?limit={limit}').get_json()['count'] == 1
+        assert related(client, headers, 'Neural network', '?limit=500').get_json()['count'] == 3
+
+
+def test_new_articles_are_picked_up(make_client):
+    with StubWikipediaServer(make_stub()) as server:
+        app, client, headers = make_client(server.url)
+        cache_articles(client, headers)
+        before = related(client, headers, 'Neural network').get_json()
+        assert 'Deep learning' not in [row['title'] for row in before['data']]
+
+        assert client.post('/api/wikipedia/fetch', json={'topic': 'Deep learning'}, headers=headers).status_code == 200
+        after = related(client, headers, 'Neural network').get_json()
+        assert after['data'][0]['title'] == 'Deep learning'
+        assert related(client, headers, 'Deep learning').get_json()['data'][0]['title'] == 'Neural network'
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("RELATED ARTICLES TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
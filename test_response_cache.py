@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test the in-process JSON response cache (offline, no Wikipedia access)"""
+
+import json
+from app import create_app
+from sqlalchemy import text
+from database import db, migrate_db, Topic, WikipediaContent, SchemaMigration, PAYLOAD_MIGRATION
+from response_cache import response_cache
+
+
+def make_client():
+    app = create_app('testing')
+    response_cache.clear()
+    return app, app.test_client()
+
+
+def test_repeated_reads_hit_cache():
+    app, client = make_client()
+    first = client.get('/api/topics')
+    hits_before = response_cache.hits
+    second = client.get('/api/topics')
+    assert first.status_code == 200
+    assert second.get_data() == first.get_data()
+    assert response_cache.hits == hits_before + 1
+
+
+def test_commit_invalidates_dependent_entries():
+    app, client = make_client()
+    before = client.get('/api/topics').get_json()
+    with app.app_context():
+        db.session.add(Topic(name='Cache Test Topic', description='Added by test'))
+        db.session.commit()
+    after = client.get('/api/topics').get_json()
+    assert len(after['data']) == len(before['data']) + 1
+
+
+def test_not_found_is_not_cached():
+    app, client = make_client()
+    client.get('/api/topics/99999')
+    client.get('/api/topics/99999')
+    assert response_cache.stats()['entries'] == 0
+
+
+def test_wikipedia_payload_matches_to_dict():
+    app, client = make_client()
+    with app.app_context():
+        item = WikipediaContent(
+            topic_name='Payload', title='Payload Test', content='Body \u00e9',
+            url='https://en.wikipedia.org/wiki/Payload', summary='Summary',
+            categories=json.dumps(['A', 'B']), references=json.dumps(['C'])
+        )
+        db.session.add(item)
+        db.session.commit()
+        assert item.payload is not None
+        assert json.loads(item.to_json()) == item.to_dict()
+
+
+def test_migration_backfills_legacy_payloads():
+    app, client = make_client()
+    with app.app_context():
+        # Rows cached before the payload column existed have none, nor maybe a fetch time
+        for title in ('Legacy One', 'Legacy Two'):
+            db.session.execute(text(
+                "INSERT INTO wikipedia_content (topic_name, title, content, summary, categories) "
+                "VALUES (:title, :title, 'Body', 'Summary', '[\"A\"]')"
+            ), {'title': title})
+        db.session.delete(db.session.get(SchemaMigration, PAYLOAD_MIGRATION))
+        db.session.commit()
+
+    migrate_db(app)
+    with app.app_context():
+        items = WikipediaContent.query.filter(WikipediaContent.title.like('Legacy%')).all()
+        assert len(items) == 2
+        for item in items:
+            assert item.payload is not None
+            assert json.loads(item.to_json()) == item.to_dict()
+
+
+def test_get_body_fieldset_does_not_poison_cache():
+    app, client = make_client()
+    full = client.get('/api/topics').get_json()
+    response_cache.clear()
+    # A GET's body is not part of the cache key, so it must not select fields
+    with_body = client.get('/api/topics', json={'fields': ['id']}).get_json()
+    assert with_body == full
+    assert client.get('/api/topics').get_json() == full
+    assert client.get('/api/topics?fields=id').get_json()['data'][0].keys() == {'id'}
+    assert client.get('/api/topics').get_json() == full
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("RESPONSE CACHE TEST")
+    print("=" * 60)
+    for test in (test_repeated_reads_hit_cache,
+                 test_commit_invalidates_dependent_entries,
+                 test_not_found_is_not_cached,
+                 test_wikipedia_payload_matches_to_dict,
+                 test_migration_backfills_legacy_payloads,
+                 test_get_body_fieldset_does_not_poison_cache):
+        test()
+        print(f"✓ {test.__name__}")
+    print(f"\nStats: {response_cache.stats()}")
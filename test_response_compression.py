@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test Accept-Encoding negotiation and compression of API responses (offline)"""
+
+import gzip
+import pytest
+from metrics import metrics
+from response_compression import brotli
+
+# /api/topics is a few hundred bytes, a single topic less than this
+MIN_SIZE = 300
+
+
+def compressed_total(cached):
+    return sum(value for name, labels, value in metrics.snapshot()['counters']
+               if name == 'http_response_compressed_total' and dict(labels)['cached'] == cached)
+
+
+def test_negotiates_from_accept_encoding(make_client):
+    _, client, _ = make_client(COMPRESS_MIN_SIZE=MIN_SIZE)
+    plain = client.get('/api/topics')
+    assert 'Content-Encoding' not in plain.headers
+    assert len(plain.get_data()) >= MIN_SIZE
+
+    encoded = client.get('/api/topics', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(encoded.get_data()) == plain.get_data()
+
+    preferred = client.get('/api/topics', headers={'Accept-Encoding': 'br;q=1.0, gzip;q=0.5'})
+    assert preferred.headers['Content-Encoding'] == ('br' if brotli is not None else 'gzip')
+
+    for refused in ('gzip;q=0', 'identity', 'deflate'):
+        response = client.get('/api/topics', headers={'Accept-Encoding': refused})
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_data() == plain.get_data()
+
+
+def test_vary_on_every_compressible_response(make_client):
+    _, client, _ = make_client(COMPRESS_MIN_SIZE=MIN_SIZE)
+    for headers in ({}, {'Accept-Encoding': 'gzip'}, {'Accept-Encoding': 'gzip;q=0'}):
+        assert 'Accept-Encoding' in client.get('/api/topics', headers=headers).vary
+    # Small responses too: a cache must not serve them to a client that asked for gzip
+    assert 'Accept-Encoding' in client.get('/api/topics/1', headers={'Accept-Encoding': 'gzip'}).vary
+
+
+def test_small_responses_are_sent_as_they_are(make_client):
+    _, client, _ = make_client(COMPRESS_MIN_SIZE=MIN_SIZE)
+    plain = client.get('/api/topics/1')
+    assert len(plain.get_data()) < MIN_SIZE
+    response = client.get('/api/topics/1', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == plain.get_data()
+
+
+def test_cache_hits_reuse_the_compressed_body(make_client):
+    _, client, _ = make_client(COMPRESS_MIN_SIZE=MIN_SIZE)
+    headers = {'Accept-Encoding': 'gzip'}
+    fresh, reused = compressed_total('false'), compressed_total('true')
+    first = client.get('/api/topics', headers=headers)
+    second = client.get('/api/topics', headers=headers)
+    assert second.get_data() == first.get_data()
+    assert compressed_total('false') == fresh + 1
+    assert compressed_total('true') == reused + 1
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("RESPONSE COMPRESSION TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
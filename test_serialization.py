@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test sparse fieldset parsing (offline)"""
+
+import pytest
+from app import create_app
+from serialization import parse_fields
+
+ALLOWED = ('id', 'title', 'summary')
+
+
+def test_no_fieldset_means_all_fields():
+    assert parse_fields(None, ALLOWED) is None
+
+
+def test_comma_separated_string():
+    assert parse_fields('id, title,', ALLOWED) == frozenset({'id', 'title'})
+
+
+def test_list_from_json_body():
+    assert parse_fields(['summary', ' id '], ALLOWED) == frozenset({'summary', 'id'})
+
+
+def test_unknown_fields_are_named():
+    with pytest.raises(ValueError, match='bogus'):
+        parse_fields('id,bogus', ALLOWED)
+
+
+@pytest.mark.parametrize('value', ['', ' , ', []])
+def test_empty_fieldset_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_fields(value, ALLOWED)
+
+
+@pytest.mark.parametrize('value', [5, {'id': True}, True])
+def test_fieldset_of_wrong_type_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_fields(value, ALLOWED)
+
+
+def test_wrong_type_in_post_body_is_a_bad_request():
+    app = create_app('testing')
+    client = app.test_client()
+    key = client.post('/api/keys/generate', json={'name': 'fields test'}).get_json()['data']['key']
+    response = client.post('/api/wikipedia/fetch', json={'topic': 'Python', 'fields': 5},
+                           headers={'X-API-Key': key})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_empty_fieldset_is_a_bad_request():
+    app = create_app('testing')
+    response = app.test_client().get('/api/topics?fields=')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("SERIALIZATION TEST")
+    print("=" * 60)
+    for test in (test_no_fieldset_means_all_fields,
+                 test_comma_separated_string,
+                 test_list_from_json_body,
+                 test_unknown_fields_are_named,
+                 test_wrong_type_in_post_body_is_a_bad_request,
+                 test_empty_fieldset_is_a_bad_request):
+        test()
+        print(f"✓ {test.__name__}")
+    for value in ('', ' , ', []):
+        test_empty_fieldset_is_rejected(value)
+    print("✓ test_empty_fieldset_is_rejected")
+    for value in (5, {'id': True}, True):
+        test_fieldset_of_wrong_type_is_rejected(value)
+    print("✓ test_fieldset_of_wrong_type_is_rejected")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test NDJSON streaming of cached article listings (offline)"""
+
+import json
+import pytest
+from sqlalchemy import text
+from database import db, WikipediaContent
+from response_cache import response_cache
+
+TITLES = ('Machine learning', 'Machine translation', 'Database')
+NDJSON = {'Accept': 'application/x-ndjson'}
+
+
+def cache_articles(app):
+    with app.app_context():
+        for title in TITLES:
+            db.session.add(WikipediaContent(topic_name=title, title=title, content=f'{title} body',
+                                            summary=f'{title} summary'))
+        db.session.commit()
+
+
+def read_lines(response):
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    body = response.get_data(as_text=True)
+    assert body.endswith('\n')
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_one_document_per_line(make_client):
+    app, client, headers = make_client()
+    cache_articles(app)
+    listing = client.get('/api/wikipedia/cache/search', headers=headers).get_json()
+    streamed = read_lines(client.get('/api/wikipedia/cache/search', headers=dict(headers, **NDJSON)))
+    assert streamed == listing['data']
+    assert len(streamed) == len(TITLES)
+
+    # stream=1 does the same for clients that can't set Accept
+    assert read_lines(client.get('/api/wikipedia/cache/search?stream=1', headers=headers)) == streamed
+    # and a client preferring JSON still gets JSON
+    both = {'Accept': 'application/json, application/x-ndjson;q=0.5'}
+    assert client.get('/api/wikipedia/cache/search', headers=dict(headers, **both)).mimetype == 'application/json'
+
+
+def test_fields_and_query(make_client):
+    app, client, headers = make_client()
+    cache_articles(app)
+    streamed = read_lines(client.get('/api/wikipedia/cache/search?q=machine&fields=title',
+                                     headers=dict(headers, **NDJSON)))
+    assert sorted(row['title'] for row in streamed) == ['Machine learning', 'Machine translation']
+    assert all(set(row) == {'title'} for row in streamed)
+
+    response = client.get('/api/wikipedia/cache/search?fields=nope', headers=dict(headers, **NDJSON))
+    assert response.status_code == 400
+
+
+def test_api_key_required(make_client):
+    app, client, headers = make_client()
+    cache_articles(app)
+    assert client.get('/api/wikipedia/cache/search', headers=NDJSON).status_code == 401
+    assert client.get('/api/wikipedia/cache/search', headers=dict(NDJSON, **{'X-API-Key': 'wrong'})).status_code == 401
+
+
+def test_streams_bypass_the_response_cache(make_client):
+    app, client, headers = make_client()
+    cache_articles(app)
+    client.get('/api/wikipedia/cache/search', headers=headers)
+    entries = response_cache.stats()['entries']
+
+    # Written without the ORM, so the cached JSON listing is not invalidated
+    with app.app_context():
+        db.session.execute(text("INSERT INTO wikipedia_content (topic_name, title, content, summary, fetched_at) "
+                                "VALUES ('Algorithm', 'Algorithm', 'Algorithm body', 'Algorithm summary', "
+                                "CURRENT_TIMESTAMP)"))
+        db.session.commit()
+
+    hits = response_cache.hits
+    streamed = read_lines(client.get('/api/wikipedia/cache/search', headers=dict(headers, **NDJSON)))
+    assert len(streamed) == len(TITLES) + 1
+    assert response_cache.hits == hits
+    assert response_cache.stats()['entries'] == entries
+    assert client.get('/api/wikipedia/cache/search', headers=headers).get_json()['count'] == len(TITLES)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("NDJSON STREAMING TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test the typo-tolerant title index and how search uses it (offline)"""
+
+import pytest
+from app import create_app
+from database import db, WikipediaAlias, WikipediaContent
+from title_index import TitleIndex, edit_distance, title_index
+from benchmarks.stub_wikipedia import StubWikipedia, StubWikipediaServer, make_page
+
+
+def cache_article(title, topic=None):
+    db.session.add(WikipediaContent(topic_name=topic or title, title=title, content=f'{title} body',
+                                    summary=f'{title} summary'))
+    db.session.commit()
+
+
+def test_edit_distance():
+    assert edit_distance('poland', 'poland', 2) == 0
+    assert edit_distance('poland', 'roland', 2) == 1  # substitution
+    assert edit_distance('quantum', 'quantm', 2) == 1  # deletion
+    assert edit_distance('quantum', 'quanttum', 2) == 1  # insertion
+    assert edit_distance('algorithm', 'algoritmh', 2) == 1  # transposition
+    assert edit_distance('algorithm', 'lagoritmh', 2) == 2
+    assert edit_distance('abc', 'xyz', 1) == 2  # capped at limit + 1
+    assert edit_distance('short', 'much longer', 2) == 3
+
+
+def test_lookup_and_suggest():
+    index = TitleIndex(max_distance=2)
+    for title in ('Poland', 'Roland', 'Machine learning', 'List of rivers', 'List of lakes'):
+        index.add(title, title)
+    index.add('ML', 'Machine learning')
+    assert index.lookup('Machine lerning') == [('Machine learning', 1)]
+    assert index.lookup('Rolland') == [('Roland', 1), ('Poland', 2)]
+    assert index.lookup('List of rivrs') == [('List of rivers', 1)]
+    assert index.lookup('Quantum computing') == []
+
+
+def test_resolve_and_suggest_refresh_incrementally():
+    app = create_app('testing')
+    with app.app_context():
+        cache_article('Quantum computing')
+        assert title_index.resolve('Quantum computng') == 'Quantum computing'
+        last_id = title_index.last_id
+
+        # Rows cached later, by any worker, are picked up on the next lookup
+        cache_article('Poland')
+        cache_article('Roland')
+        assert title_index.suggest('Rolland') == ['Roland']  # Poland is two edits away
+        assert title_index.last_id > last_id
+        assert title_index.resolve('Rolland') == 'Roland'
+        assert title_index.resolve('Soland') is None  # as close to Poland as to Roland
+        assert title_index.resolve('Rome') is None  # shorter than FUZZY_MIN_LENGTH
+
+
+def test_search_prefers_the_real_article_over_a_cached_near_miss(make_client):
+    pages = [make_page(title, sections=1) for title in ('Poland', 'Roland')]
+    stub = StubWikipedia(pages)
+    with StubWikipediaServer(stub) as server:
+        app, client, headers = make_client(server.url)
+        with app.app_context():
+            cache_article('Roland')
+
+        poland = client.post('/api/wikipedia/search', json={'topic': 'Poland'}, headers=headers).get_json()
+        assert poland['title'] == 'Poland'
+        assert 'corrected_from' not in poland
+        assert poland['suggestions'] == ['Roland']
+
+        # Wikipedia has no "Rolland": the cached near miss answers instead
+        rolland = client.post('/api/wikipedia/search', json={'topic': 'Rolland'}, headers=headers).get_json()
+        assert rolland['title'] == 'Roland'
+        assert rolland['corrected_from'] == 'Rolland'
+        with app.app_context():
+            alias = WikipediaAlias.query.filter_by(alias='rolland').one()
+            assert (alias.title, alias.source) == ('Roland', 'fuzzy')
+
+        # The typo is now a known alias: answered from the cache without asking Wikipedia
+        requests_before = stub.request_count
+        again = client.post('/api/wikipedia/search', json={'topic': 'Rolland'}, headers=headers).get_json()
+        assert again['title'] == 'Roland'
+        assert again['cached'] is True
+        assert stub.request_count == requests_before
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("TITLE INDEX TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
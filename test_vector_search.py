@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test the memory-mapped vector search index and mode=vector searches (offline, needs numpy)"""
+
+import json
+import os
+import tempfile
+import pytest
+from database import db, WikipediaContent
+from vector_search import vector_index
+
+numpy = pytest.importorskip('numpy')
+
+ARTICLES = {
+    'Machine learning': 'Machine learning studies algorithms that learn from data.',
+    'Quantum computing': 'Quantum computers use qubits and superposition.',
+    'Database': 'A database stores records and answers queries.',
+}
+
+
+def cache_article(title):
+    item = WikipediaContent(topic_name=title, title=title, content=ARTICLES.get(title, f'{title} body'),
+                            summary=ARTICLES.get(title, title))
+    db.session.add(item)
+    db.session.commit()
+    return item.id
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_initial_build_and_incremental_append(make_client):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_client(VECTOR_SEARCH_DIR=directory)[0]
+        with app.app_context():
+            ids = [cache_article(title) for title in ARTICLES]
+            vector_index.refresh()
+            meta = read_meta(directory)
+            assert (meta['rows'], meta['last_id']) == (3, ids[-1])
+            assert vector_index.rows == 3
+            assert list(vector_index.ids) == ids
+            assert os.path.getsize(os.path.join(directory, 'vectors.f32')) == 3 * 4 * vector_index.dimensions
+
+            # A new row is appended to the same build, not rebuilt
+            build = meta['build']
+            new_id = cache_article('Neural network')
+            vector_index.refresh()
+            meta = read_meta(directory)
+            assert (meta['rows'], meta['last_id'], meta['build']) == (4, new_id, build)
+            assert list(vector_index.ids) == ids + [new_id]
+
+
+def test_rebuild_after_deleted_rows(make_client):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_client(VECTOR_SEARCH_DIR=directory)[0]
+        with app.app_context():
+            ids = [cache_article(title) for title in ARTICLES]
+            vector_index.refresh()
+            build = read_meta(directory)['build']
+
+            db.session.delete(db.session.get(WikipediaContent, ids[0]))
+            db.session.commit()
+            vector_index.refresh()
+            meta = read_meta(directory)
+            assert meta['build'] != build
+            assert meta['rows'] == 2
+            assert list(vector_index.ids) == ids[1:]
+            assert all(row_id != ids[0] for row_id, _ in vector_index.search('machine learning'))
+
+
+def test_vector_search_ranks_and_selects_fields(make_client):
+    with tempfile.TemporaryDirectory() as directory:
+        app, client, headers = make_client(VECTOR_SEARCH_DIR=directory)
+        with app.app_context():
+            for title in ARTICLES:
+                cache_article(title)
+
+        result = client.get('/api/wikipedia/cache/search?mode=vector&q=quantum+qubit&fields=title',
+                            headers=headers).get_json()
+        assert result['mode'] == 'vector'
+        assert result['data'][0]['title'] == 'Quantum computing'
+        assert set(result['data'][0]) == {'score', 'title'}
+        scores = [row['score'] for row in result['data']]
+        assert scores == sorted(scores, reverse=True)
+
+        # Misspelled words still share most of their trigrams
+        result = client.get('/api/wikipedia/cache/search?mode=vector&q=databse&limit=1',
+                            headers=headers).get_json()
+        assert result['count'] == 1
+        assert result['data'][0]['title'] == 'Database'
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("VECTOR SEARCH TEST")
+    print("=" * 60)
+    raise SystemExit(pytest.main([__file__, '-v']))
@@ -0,0 +1,173 @@
+import threading
+from flask import has_app_context
+from database import db, WikipediaContent, WikipediaAlias
+
+
+def edit_distance(a, b, limit):
+    """Edit distance (with transpositions) between two strings, capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def deletes(term, distance):
+    """The term and every string made from it by removing up to ``distance`` characters"""
+    results = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        results |= frontier
+    return results
+
+
+class TitleIndex:
+    """Typo-tolerant lookup of cached article titles and topic names.
+
+    A symmetric-delete index: every known name is stored under all the
+    strings made by deleting up to ``max_distance`` characters from its
+    first ``prefix_length`` characters, and again from its last ones. A
+    query is looked up the same way, and only the side with fewer
+    candidates is checked with a real edit distance on the full name (many
+    titles share a start like "List of", fewer share both ends). Names are
+    normalized like aliases (see WikipediaAlias.normalize).
+
+    The index lives in each worker process. ``refresh`` adds the rows
+    cached since the last refresh, by any worker, so it stays current
+    without a rebuild.
+    """
+
+    def __init__(self, max_distance=1, prefix_length=7):
+        self.enabled = True
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.auto_resolve_distance = 1
+        self.min_length = 5
+        self.names = {}  # normalized name -> canonical title
+        # Delete of a name's prefix/suffix -> names (a str while there is only one)
+        self.prefixes = {}
+        self.suffixes = {}
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the index from the application config"""
+        self.enabled = app.config.get('FUZZY_LOOKUP_ENABLED', True)
+        self.max_distance = app.config.get('FUZZY_MAX_DISTANCE', self.max_distance)
+        self.prefix_length = app.config.get('FUZZY_PREFIX_LENGTH', self.prefix_length)
+        self.auto_resolve_distance = app.config.get('FUZZY_AUTO_RESOLVE_DISTANCE', self.auto_resolve_distance)
+        self.min_length = app.config.get('FUZZY_MIN_LENGTH', self.min_length)
+        app.extensions['title_index'] = self
+        self.clear()
+
+    def add(self, name, title):
+        """Make ``title`` findable under ``name`` and its near misses"""
+        name = WikipediaAlias.normalize(name or '')
+        if not name:
+            return
+        if name in self.names:
+            self.names[name] = title
+            return
+        self.names[name] = title
+        self._post(self.prefixes, name[:self.prefix_length], name)
+        self._post(self.suffixes, name[-self.prefix_length:], name)
+
+    def _post(self, postings, part, name):
+        for key in deletes(part, self.max_distance):
+            names = postings.get(key)
+            if names is None:
+                # Most keys belong to one name; don't allocate a list for those
+                postings[key] = name
+            elif isinstance(names, str):
+                postings[key] = [names, name]
+            else:
+                names.append(name)
+
+    def _candidates(self, postings, part):
+        """Posting lists of every delete of a query's prefix/suffix, and their total length"""
+        found = []
+        total = 0
+        for key in deletes(part, self.max_distance):
+            names = postings.get(key)
+            if names is not None:
+                names = (names,) if isinstance(names, str) else names
+                found.append(names)
+                total += len(names)
+        return found, total
+
+    def refresh(self):
+        """Add the titles and topic names of rows cached since the last refresh"""
+        if not has_app_context():
+            return
+        with self._lock:
+            rows = db.session.query(
+                WikipediaContent.id, WikipediaContent.title, WikipediaContent.topic_name
+            ).filter(WikipediaContent.id > self.last_id).order_by(WikipediaContent.id)
+            for row_id, title, topic_name in rows.yield_per(5000):
+                self.add(title, title)
+                self.add(topic_name, title)
+                self.last_id = row_id
+
+    def lookup(self, query, limit=5):
+        """Known titles within ``max_distance`` edits of the query, as (title, distance), closest first"""
+        query = WikipediaAlias.normalize(query)
+        if not query:
+            return []
+        by_prefix = self._candidates(self.prefixes, query[:self.prefix_length])
+        by_suffix = self._candidates(self.suffixes, query[-self.prefix_length:])
+        postings = min(by_prefix, by_suffix, key=lambda side: side[1])[0]
+        seen = set()
+        matches = {}
+        for names in postings:
+            for name in names:
+                if name in seen:
+                    continue
+                seen.add(name)
+                distance = edit_distance(query, name, self.max_distance)
+                if distance <= self.max_distance:
+                    title = self.names[name]
+                    if distance < matches.get(title, self.max_distance + 1):
+                        matches[title] = distance
+        return sorted(matches.items(), key=lambda match: (match[1], match[0]))[:limit]
+
+    def resolve(self, query):
+        """The single closest title if it is close enough to use in place of the query, else None"""
+        if not self.enabled or len(WikipediaAlias.normalize(query)) < self.min_length:
+            return None
+        self.refresh()
+        matches = self.lookup(query, limit=2)
+        if not matches or matches[0][1] > self.auto_resolve_distance:
+            return None
+        if len(matches) > 1 and matches[1][1] == matches[0][1]:
+            return None  # ambiguous
+        return matches[0][0]
+
+    def suggest(self, query, limit=5):
+        """Titles close to the query, closest first"""
+        if not self.enabled:
+            return []
+        self.refresh()
+        return [title for title, _ in self.lookup(query, limit)]
+
+    def clear(self):
+        """Forget every name; the next refresh reloads them all"""
+        with self._lock:
+            self.names.clear()
+            self.prefixes.clear()
+            self.suffixes.clear()
+            self.last_id = 0
+
+
+title_index = TitleIndex()
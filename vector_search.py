@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from flask import has_app_context
+from sqlalchemy import func
+from database import db, WikipediaContent, load_fields
+from related_index import STOPWORDS, hashed_vector
+
+try:
+    import numpy
+except ImportError:  # optional, mode=vector is unavailable without it
+    numpy = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; there a single process owns the files
+    fcntl = None
+
+WORD = re.compile(r'\w+')
+
+
+def char_ngrams(text, n=3):
+    """Character n-grams of every lowercased word (stopwords skipped), padded with a space at both ends"""
+    grams = []
+    for word in WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        padded = f' {word} '
+        grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class VectorSearchIndex:
+    """Ranked search over cached articles by hashed character n-gram vectors.
+
+    Every cached row is a unit vector of ``dimensions`` hashed character
+    trigram counts of its title, summary and content, so queries match
+    word fragments and misspellings as well as whole words. A query is
+    scored against all rows with one matrix-vector product and the best
+    ``limit`` are picked with argpartition; CPU only, NumPy required.
+
+    The vectors live on disk in ``directory`` (``vectors.f32``, the row
+    ids in ``ids.i64`` and ``meta.json``) and each worker maps them with
+    numpy.memmap, so all workers share one copy in the page cache. New
+    rows are appended incrementally under a file lock by whichever worker
+    first sees them; the others re-map when ``meta.json`` says the matrix
+    has grown. ``meta.json`` also records a fingerprint of the database
+    URI, and the files are rebuilt from scratch when they were built from
+    another database or rows they cover have since been deleted.
+    """
+
+    def __init__(self, directory='vector_index', dimensions=512):
+        self.enabled = True
+        self.directory = directory
+        self.dimensions = dimensions
+        self.matrix = None
+        self.ids = None
+        self.rows = 0
+        self.build = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the index from the application config"""
+        self.enabled = app.config.get('VECTOR_SEARCH_ENABLED', True)
+        self.directory = app.config.get('VECTOR_SEARCH_DIR', self.directory)
+        self.dimensions = app.config.get('VECTOR_SEARCH_DIMENSIONS', self.dimensions)
+        self.matrix = None
+        self.ids = None
+        self.rows = 0
+        self.build = None
+        app.extensions['vector_search'] = self
+
+    @property
+    def available(self):
+        return self.enabled and numpy is not None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def vector(self, text):
+        """Dense float32 unit vector of a text"""
+        dense = numpy.zeros(self.dimensions, dtype=numpy.float32)
+        sparse = hashed_vector(char_ngrams(text), self.dimensions)
+        if sparse:
+            dense[list(sparse)] = list(sparse.values())
+        return dense
+
+    @staticmethod
+    def _database():
+        """Fingerprint of the database the index is built from"""
+        url = db.engine.url.render_as_string(hide_password=True)
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+
+    def _empty_meta(self, database):
+        return {'dimensions': self.dimensions, 'database': database, 'build': os.urandom(8).hex(),
+                'rows': 0, 'last_id': 0}
+
+    def _read_meta(self, database):
+        try:
+            with open(self._path('meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if meta is None or meta.get('dimensions') != self.dimensions or meta.get('database') != database:
+            # Missing, unreadable or built with other settings or from another database: start over
+            meta = self._empty_meta(database)
+        return meta
+
+    def _write_meta(self, meta):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize appends across worker processes"""
+        with open(self._path('.lock'), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def refresh(self):
+        """Append vectors for rows cached since the last build, then map the current files"""
+        if not self.available or not has_app_context():
+            return
+        with self._lock:
+            database = self._database()
+            meta = self._read_meta(database)
+            newest, count = db.session.query(
+                func.max(WikipediaContent.id), func.count(WikipediaContent.id)
+            ).one()
+            newest = newest or 0
+            changed = newest != meta['last_id'] or count < meta['rows']
+            if not changed and self._mapped(meta):
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with self._file_lock():
+                # Another worker may have appended or rebuilt since meta.json was read above
+                meta = self._read_meta(database)
+                if newest < meta['last_id'] or count < meta['rows']:
+                    # Rows the files cover are gone (deleted, or the database was reset)
+                    meta = self._append(self._empty_meta(database))
+                elif newest != meta['last_id']:
+                    meta = self._append(meta)
+                if not self._mapped(meta):
+                    self._map(meta)
+
+    def _mapped(self, meta):
+        """Whether the mapped matrix is the one ``meta`` describes"""
+        if not meta['rows']:
+            return self.matrix is None
+        return self.matrix is not None and meta['rows'] == self.rows and meta['build'] == self.build
+
+    def _append(self, meta):
+        """Add the rows newer than ``meta['last_id']`` to the files (caller holds the file lock)"""
+        vectors_path = self._path('vectors.f32')
+        ids_path = self._path('ids.i64')
+        for path, itemsize in ((vectors_path, 4 * self.dimensions), (ids_path, 8)):
+            if not meta['rows']:
+                # A new build gets new files; workers still mapping the old ones keep them
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            # Drop anything past the last recorded row, e.g. from an interrupted append
+            with open(path, 'ab') as f:
+                f.truncate(meta['rows'] * itemsize)
+
+        rows = WikipediaContent.query.options(
+            load_fields(WikipediaContent, ('title', 'summary', 'content'))
+        ).filter(WikipediaContent.id > meta['last_id']).order_by(WikipediaContent.id)
+        with open(vectors_path, 'ab') as vectors, open(ids_path, 'ab') as ids:
+            batch = []
+            for item in rows.yield_per(200):
+                batch.append((item.id, '\n'.join((item.title, item.summary or '', item.content or ''))))
+                if len(batch) == 200:
+                    self._write_batch(batch, vectors, ids, meta)
+                    batch = []
+            if batch:
+                self._write_batch(batch, vectors, ids, meta)
+        self._write_meta(meta)
+        return meta
+
+    def _write_batch(self, batch, vectors, ids, meta):
+        numpy.stack([self.vector(text) for _, text in batch]).tofile(vectors)
+        numpy.array([row_id for row_id, _ in batch], dtype=numpy.int64).tofile(ids)
+        vectors.flush()
+        ids.flush()
+        meta['rows'] += len(batch)
+        meta['last_id'] = batch[-1][0]
+
+    def _map(self, meta):
+        self.rows = meta['rows']
+        self.build = meta['build']
+        if not self.rows:
+            self.matrix = None
+            self.ids = None
+            return
+        self.matrix = numpy.memmap(self._path('vectors.f32'), dtype=numpy.float32, mode='r',
+                                   shape=(self.rows, self.dimensions))
+        self.ids = numpy.memmap(self._path('ids.i64'), dtype=numpy.int64, mode='r', shape=(self.rows,))
+
+    def search(self, query, limit=20):
+        """Ids of the cached rows closest to the query, as (id, score), best first"""
+        if not self.available:
+            return []
+        self.refresh()
+        with self._lock:
+            matrix, ids = self.matrix, self.ids
+        if matrix is None:
+            return []
+        scores = matrix @ self.vector(query)
+        count = min(limit, len(scores))
+        top = numpy.argpartition(-scores, count - 1)[:count]
+        top = top[numpy.argsort(-scores[top])]
+        return [(int(ids[row]), round(float(scores[row]), 4)) for row in top if scores[row] > 0]
+
+
+vector_index = VectorSearchIndex()
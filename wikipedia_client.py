@@ -0,0 +1,172 @@
+import threading
+import time
+from contextlib import contextmanager
+import requests
+import wikipediaapi
+from cassette import Cassette, CassetteMissError  # noqa: F401 (re-exported)
+from circuit_breaker import is_upstream_failure
+from deadlines import DeadlineExceeded
+from metrics import metrics
+import server_timing
+
+DEFAULT_USER_AGENT = 'WikiContentFetcher/1.0 (Wikipedia Content Fetcher)'
+
+TRANSPORT_MODES = ('live', 'record', 'replay')
+
+
+class CallCounter:
+    """Counts upstream calls made while it is active"""
+
+    def __init__(self):
+        self.count = 0
+
+
+class WikipediaClient(wikipediaapi.Wikipedia):
+    """wikipediaapi client whose MediaWiki endpoint and transport can be overridden.
+
+    ``api_url`` points the client at another MediaWiki API, such as the
+    stub server used by the benchmarks; by default it talks to
+    https://<language>.wikipedia.org/w/api.php like wikipediaapi does.
+
+    ``transport`` is one of ``live`` (default), ``record`` (call upstream
+    and save every response to ``cassette``) or ``replay`` (answer only
+    from ``cassette``, never touching the network).
+
+    ``breaker`` is an optional CircuitBreaker guarding the network calls.
+    Within a ``deadline_scope`` each call's timeout is cut to the time the
+    deadline has left.
+    """
+
+    def __init__(self, api_url=None, language='en', user_agent=DEFAULT_USER_AGENT, timeout=10.0,
+                 transport='live', cassette=None, breaker=None):
+        # Don't use ExtractFormat to avoid keyword errors
+        super().__init__(language=language, user_agent=user_agent, timeout=timeout)
+        if transport not in TRANSPORT_MODES:
+            raise ValueError(f'Unsupported transport: {transport}')
+        if transport != 'live' and not cassette:
+            raise ValueError(f'Transport "{transport}" requires a cassette path')
+        self.api_url = api_url
+        self.transport = transport
+        self.cassette = Cassette(cassette) if transport != 'live' else None
+        self.breaker = breaker
+        self._local = threading.local()
+
+    def _api_url(self, page):
+        """Get the MediaWiki API endpoint for a page"""
+        return self.api_url or f'https://{page.language}.wikipedia.org/w/api.php'
+
+    @contextmanager
+    def count_calls(self, topic=None):
+        """Count upstream calls made by the current thread within the block"""
+        counter = CallCounter()
+        counters = self._local.__dict__.setdefault('counters', [])
+        counters.append(counter)
+        try:
+            yield counter
+        finally:
+            counters.remove(counter)
+            if topic is not None and self.transport == 'record':
+                self.cassette.record_fetch(topic, counter.count)
+
+    @contextmanager
+    def deadline_scope(self, deadline):
+        """Bound upstream calls made by the current thread within the block by a Deadline"""
+        previous = getattr(self._local, 'deadline', None)
+        self._local.deadline = deadline
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def _request_timeout(self):
+        """Timeout for the next call: the configured one, or less if a deadline is near"""
+        timeout = self._request_kwargs.get('timeout')
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return timeout, False
+        deadline.check()
+        remaining = deadline.remaining()
+        if timeout is None or remaining < timeout:
+            return remaining, True
+        return timeout, False
+
+    def links_and_categories(self, page, links=15, categories=20):
+        """Titles of the first ``links`` links and ``categories`` categories of a page.
+
+        ``page.links`` and ``page.categories`` load the complete lists, one
+        call per 500 entries, even when only a handful are used. This asks
+        for just as many as needed, both in a single call. Either limit can
+        be 0 to skip that list. Returns ``(links, categories)``.
+        """
+        props = {}
+        if links:
+            props['links'] = ('pllimit', links)
+        if categories:
+            props['categories'] = ('cllimit', categories)
+        if not props:
+            return [], []
+
+        params = {
+            'action': 'query',
+            'prop': '|'.join(props),
+            'titles': page.title
+        }
+        params.update(props.values())
+        raw = self._query(page, params)
+        self._common_attributes(raw['query'], page)
+        for key, entry in raw['query']['pages'].items():
+            if key == '-1':
+                page._attributes['pageid'] = -1
+                break
+            return (
+                [link['title'] for link in entry.get('links', [])][:links],
+                [category['title'] for category in entry.get('categories', [])][:categories]
+            )
+        return [], []
+
+    def _query(self, page, params):
+        """Query the MediaWiki API through the configured transport"""
+        used_params = self._construct_params(page, params)
+        if self.transport != 'replay':
+            timeout, budget_limited = self._request_timeout()
+            if self.breaker is not None:
+                self.breaker.before_call()
+        for counter in getattr(self._local, 'counters', ()):
+            counter.count += 1
+
+        if self.transport == 'replay':
+            return self.cassette.get(used_params)
+
+        prop = str(used_params.get('prop', used_params.get('list', 'other')))
+        start = time.perf_counter()
+        try:
+            response = self._session.get(self._api_url(page), params=used_params,
+                                         **dict(self._request_kwargs, timeout=timeout))
+            response.raise_for_status()
+            raw = response.json()
+        except Exception as e:
+            budget_timeout = budget_limited and isinstance(e, requests.Timeout)
+            metrics.inc('wikipedia_upstream_requests_total', prop=prop,
+                        outcome='deadline' if budget_timeout else 'error')
+            if budget_timeout:
+                # Cut short by the request's deadline, not by a slow upstream
+                if self.breaker is not None:
+                    self.breaker.record_cancelled()
+                raise DeadlineExceeded(f'Request deadline reached while calling Wikipedia: {e}') from e
+            if self.breaker is not None:
+                if is_upstream_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.observe('wikipedia_upstream_request_duration_seconds', elapsed, prop=prop)
+            server_timing.record('upstream', elapsed)
+        metrics.inc('wikipedia_upstream_requests_total', prop=prop, outcome='ok')
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+        if self.transport == 'record':
+            self.cassette.record(used_params, raw)
+        return raw
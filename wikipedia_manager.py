@@ -1,57 +1,240 @@
-import wikipediaapi
 import json
-from database import db, WikipediaContent, APIKey
+from flask import has_app_context
+from sqlalchemy.orm import load_only
+from database import db, WikipediaContent, WikipediaSection, WikipediaLink, WikipediaAlias, APIKey, load_fields
+from circuit_breaker import CircuitOpenError
+from cassette import CassetteMissError
+from deadlines import DeadlineExceeded
+from title_index import title_index
+from related_index import related_index
+from vector_search import vector_index
+from article_extractor import extract_article, format_article
+from serialization import dumps, json_list
+from metrics import metrics
+import server_timing
 from datetime import datetime
 
 class WikipediaManager:
     """Manages Wikipedia content fetching and caching"""
+
+    # Fields a client can select with fields=
+    FETCH_FIELDS = ('title', 'url', 'content', 'summary', 'categories', 'references', 'full_text')
+    SEARCH_FIELDS = ('title', 'summary')
+
+    # How many links (as references) and categories a fetch keeps
+    MAX_LINKS = 15
+    MAX_CATEGORIES = 20
     
-    def __init__(self):
-        # Don't use ExtractFormat to avoid keyword errors
-        self.wiki = wikipediaapi.Wikipedia(
-            language='en',
-            user_agent='WikiContentFetcher/1.0 (Wikipedia Content Fetcher)'
-        )
+    def __init__(self, api_url=None, timeout=10.0, transport='live', cassette=None, breaker=None,
+                 persist_links=False):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.transport = transport
+        self.cassette = cassette
+        self.breaker = breaker
+        self.persist_links = persist_links
+        self._wiki = None
+
+    @property
+    def wiki(self):
+        """Wikipedia client, created (and wikipediaapi imported) on first use"""
+        if self._wiki is None:
+            from wikipedia_client import WikipediaClient
+            self._wiki = WikipediaClient(
+                api_url=self.api_url,
+                timeout=self.timeout,
+                transport=self.transport,
+                cassette=self.cassette,
+                breaker=self.breaker
+            )
+        return self._wiki
     
     @staticmethod
     def validate_api_key(api_key):
         """Validate if API key is valid and active"""
-        key = APIKey.query.filter_by(key=api_key, is_active=True).first()
-        if key:
-            key.requests_count += 1
-            key.last_used = datetime.utcnow()
-            db.session.commit()
-            return True
-        return False
+        with metrics.timer('api_key_validation_duration_seconds'), server_timing.phase('auth'):
+            key = APIKey.query.filter_by(key=api_key, is_active=True).first()
+            if key:
+                key.requests_count += 1
+                key.last_used = datetime.utcnow()
+                db.session.commit()
+                return True
+            return False
     
-    def search_wikipedia(self, topic):
-        """Search Wikipedia for a topic"""
+    def search_wikipedia(self, topic, deadline=None, fields=None):
+        """Search Wikipedia for a topic, within an optional Deadline.
+
+        ``fields`` limits the result to some of SEARCH_FIELDS; without
+        'summary' only the page info is requested upstream. Topics already
+        resolved to a cached article (under any alias) are answered from the
+        cache without calling Wikipedia. A close misspelling of a cached
+        title is only used in place of the topic when Wikipedia has no page
+        for it or can't be reached; otherwise it is offered in
+        ``suggestions`` next to the article Wikipedia found.
+        """
+        title = self.resolve_alias(topic)
+        if title is not None:
+            cached = self._find_cached(title, fields=('title', 'summary'))
+            if cached:
+                return self._select_fields(self._cached_search_result(cached, cached=True),
+                                           self.SEARCH_FIELDS, fields)
+
         try:
-            page = self.wiki.page(title=topic)
-            
-            if page.exists():
-                return {
+            with self.wiki.deadline_scope(deadline):
+                page = self.wiki.page(title=self._upstream_title(topic, title))
+                exists = page.exists()
+                want_summary = fields is None or 'summary' in fields
+                summary = page.summary if exists and want_summary else ''
+
+            if exists:
+                self._remember_aliases(topic, page)
+                result = self._select_fields({
                     'success': True,
                     'title': page.title,
                     'is_exists': True,
-                    'summary': page.summary[:300] if page.summary else ''
-                }
+                    'summary': summary[:300] if summary else ''
+                }, self.SEARCH_FIELDS, fields)
+                suggestions = [match for match in title_index.suggest(topic) if match != page.title]
+                if suggestions:
+                    result['suggestions'] = suggestions
+                return result
             else:
+                corrected = self._corrected_search_result(topic, fields, remember=True, cached=True)
+                if corrected:
+                    return corrected
                 return {
                     'success': False,
                     'is_exists': False,
-                    'message': f'No Wikipedia page found for "{topic}"'
+                    'message': f'No Wikipedia page found for "{topic}"',
+                    'suggestions': title_index.suggest(topic)
                 }
+        except CassetteMissError:
+            raise
         except Exception as e:
-            return {
-                'success': False,
-                'message': f'Error searching Wikipedia: {str(e)}'
+            cached = self._find_cached(topic, fields=('title', 'summary'))
+            if cached:
+                return self._select_fields(self._cached_search_result(cached, stale=True),
+                                           self.SEARCH_FIELDS, fields)
+            corrected = self._corrected_search_result(topic, fields, stale=True)
+            if corrected:
+                return corrected
+            return self._upstream_error('Error searching Wikipedia', e)
+
+    def _corrected_search_result(self, topic, fields, remember=False, **flags):
+        """Search result for the cached article a misspelled topic resolves to, or None.
+
+        With ``remember`` (Wikipedia confirmed it has no such page) the
+        correction is recorded as a 'fuzzy' alias, so the same typo is
+        answered from the cache next time without asking Wikipedia again.
+        """
+        match = title_index.resolve(topic)
+        cached = self._find_cached(match, fields=('title', 'summary')) if match else None
+        if not cached:
+            return None
+        if remember:
+            self._remember_alias(topic, cached.title, 'fuzzy')
+        result = self._cached_search_result(cached, corrected_from=topic, **flags)
+        return self._select_fields(result, self.SEARCH_FIELDS, fields)
+
+    @staticmethod
+    def _cached_search_result(row, **flags):
+        """Search result built from a cached copy, marked with ``flags`` (cached/stale)"""
+        result = {
+            'success': True,
+            'title': row.title,
+            'is_exists': True,
+            'summary': row.summary[:300] if row.summary else ''
+        }
+        result.update(flags)
+        return result
+
+    def _upstream_title(self, topic, alias_title):
+        """Title to request upstream for a topic: its canonical title if it is a known alias.
+
+        Recording and replaying a cassette always request the topic as
+        given, since the alias table changes between runs and replayed
+        requests must match the recorded ones exactly.
+        """
+        if self.transport != 'live':
+            return topic
+        return alias_title or topic
+
+    @staticmethod
+    def resolve_alias(topic):
+        """Canonical title a topic is known to resolve to, or None"""
+        try:
+            row = db.session.query(WikipediaAlias.title).filter_by(
+                alias=WikipediaAlias.normalize(topic)
+            ).first()
+        except Exception:
+            return None
+        return row[0] if row else None
+
+    @staticmethod
+    def _remember_alias(topic, title, source):
+        """Record a single topic as an alias of ``title``, unless it is already known"""
+        if not has_app_context():
+            return
+        alias = WikipediaAlias.normalize(topic)
+        try:
+            if WikipediaAlias.query.filter_by(alias=alias).first() is None:
+                db.session.add(WikipediaAlias(alias=alias, title=title, source=source))
+                db.session.commit()
+        except Exception:
+            # Another worker may have recorded the same alias first
+            db.session.rollback()
+
+    @staticmethod
+    def _remember_aliases(topic, page):
+        """Record the topic and the redirects Wikipedia followed as aliases of the page's title"""
+        if not has_app_context():
+            return
+        aliases = {}
+        for redirect in page._attributes.get('redirects') or ():
+            aliases[WikipediaAlias.normalize(redirect['from'])] = 'redirect'
+        aliases.setdefault(WikipediaAlias.normalize(topic), 'query')
+        aliases.setdefault(WikipediaAlias.normalize(page.title), 'title')
+        try:
+            existing = {
+                row.alias: row
+                for row in WikipediaAlias.query.filter(WikipediaAlias.alias.in_(list(aliases)))
             }
+            changed = False
+            for alias, source in aliases.items():
+                row = existing.get(alias)
+                if row is None:
+                    db.session.add(WikipediaAlias(alias=alias, title=page.title, source=source))
+                    changed = True
+                elif row.title != page.title:
+                    row.title = page.title
+                    row.source = source
+                    changed = True
+            if changed:
+                db.session.commit()
+        except Exception:
+            # Another worker may have recorded the same alias first
+            db.session.rollback()
     
-    def fetch_wikipedia_content(self, topic):
-        """Fetch complete content from Wikipedia"""
+    def fetch_wikipedia_content(self, topic, deadline=None, fields=None):
+        """Fetch content from Wikipedia, within an optional Deadline.
+
+        ``fields`` limits the result to some of FETCH_FIELDS and skips the
+        work (and upstream calls) for the others. Only complete fetches
+        are written to the cache.
+        """
+        with self.wiki.count_calls(topic) as calls, self.wiki.deadline_scope(deadline):
+            result = self._fetch_wikipedia_content(topic, fields)
+        result['upstream_calls'] = calls.count
+        return result
+
+    def _fetch_wikipedia_content(self, topic, fields=None):
+        """Fetch and cache a page; every upstream call happens in here"""
+        def want(field):
+            return fields is None or field in fields
+
         try:
-            page = self.wiki.page(title=topic)
+            # Ask for the canonical title directly when the topic is a known alias
+            page = self.wiki.page(title=self._upstream_title(topic, self.resolve_alias(topic)))
             
             # If page doesn't exist or is too small, return error
             if not page.exists():
@@ -59,115 +242,179 @@ class WikipediaManager:
                     'success': False,
                     'message': f'No Wikipedia page found for "{topic}"'
                 }
+            self._remember_aliases(topic, page)
             
-            # Check if page has sufficient content
-            if not page.text or len(page.text.strip()) < 100:
-                return {
-                    'success': False,
-                    'message': f'Insufficient content for "{topic}" on Wikipedia'
-                }
-            
-            # Extract sections
-            sections = []
-            try:
-                for section in page.sections:
-                    section_title = section
-                    section_content = page.section(section)
-                    if section_content and len(section_content.strip()) > 0:
-                        sections.append({
-                            'title': section_title,
-                            'content': section_content[:1000]  # Limit section length
-                        })
-            except Exception:
-                pass  # Sections might not be available
+            # Read the text and the whole section tree in one pass
+            article = None
+            if want('content') or want('summary') or want('full_text'):
+                article = extract_article(page)
+
+                # Check if page has sufficient content
+                if len(article.text) < 100:
+                    return {
+                        'success': False,
+                        'message': f'Insufficient content for "{topic}" on Wikipedia'
+                    }
             
-            # Extract categories
+            # Categories and links are optional: if the deadline runs out
+            # while fetching them, return what we have as a partial result
+            partial = False
+
+            # Only as many links and categories as are kept, in one call,
+            # unless the complete link list is wanted for the link graph
             categories = []
-            try:
-                if hasattr(page, 'categories'):
-                    categories = list(page.categories.keys())[:20]
-            except Exception:
-                pass
-            
-            # Extract links for references  
             links = []
+            all_links = None
             try:
-                if hasattr(page, 'links'):
-                    links = list(page.links.keys())[:15]
+                links, categories = self.wiki.links_and_categories(
+                    page,
+                    links=self.MAX_LINKS if want('references') and not self.persist_links else 0,
+                    categories=self.MAX_CATEGORIES if want('categories') else 0
+                )
+                if self.persist_links and want('references'):
+                    all_links = list(page.links)
+                    links = all_links[:self.MAX_LINKS]
+            except DeadlineExceeded:
+                partial = True
+            except CassetteMissError:
+                raise
             except Exception:
                 pass
             
             # Get full text
-            full_text = page.text if page.text else ""
+            full_text = article.text if article else ""
             
             # Limit full text to reasonable length
             if len(full_text) > 10000:
                 full_text = full_text[:10000] + "..."
             
             # Format the content
-            formatted_content = self._format_content(page, sections)
+            formatted_content = ""
+            if want('content'):
+                with server_timing.phase('format'):
+                    formatted_content = format_article(article)
             
             # Try to cache the content (will fail gracefully outside app context)
             try:
                 from flask import has_request_context
                 from flask.globals import app_ctx
-                # Only try to cache if we have an app context
-                if app_ctx is not None:
+                # Only try to cache complete results, and only with an app context
+                if app_ctx is not None and not partial and fields is None:
                     cached = WikipediaContent(
                         topic_name=topic,
                         title=page.title,
                         content=formatted_content,
                         url=page.fullurl,
-                        summary=page.summary[:500] if page.summary else "",
+                        summary=article.summary[:500],
                         categories=json.dumps(categories),
-                        references=json.dumps(links)
+                        references=json.dumps(links),
+                        sections=[WikipediaSection(**row) for row in article.sections]
                     )
                     db.session.add(cached)
+                    if all_links is not None:
+                        self._save_links(page.title, all_links)
                     db.session.commit()
             except Exception as cache_error:
                 # Silently ignore cache errors - content is still valid
                 pass
             
-            return {
+            result = {
                 'success': True,
                 'title': page.title,
                 'url': page.fullurl,
                 'content': formatted_content,
-                'summary': page.summary if page.summary else "",
+                'summary': article.summary if article else "",
                 'categories': categories,
                 'references': links,
                 'full_text': full_text
             }
+            if partial:
+                result['partial'] = True
+            return self._select_fields(result, self.FETCH_FIELDS, fields)
         
+        except CassetteMissError:
+            # A replay asking for something never recorded is a broken
+            # cassette, not an outage to paper over with the cached copy
+            raise
         except Exception as e:
-            return {
-                'success': False,
-                'message': f'Error fetching Wikipedia content: {str(e)}'
-            }
-    
-    def _format_content(self, page, sections):
-        """Format Wikipedia content with proper structure"""
-        formatted = f"""
-# {page.title}
-
-## Summary
-{page.summary}
-
-## Overview
-{page.text[:1000]}...
-
-## Key Sections
-"""
-        for section in sections[:5]:  # Limit to first 5 sections
-            if section['content']:
-                formatted += f"\n### {section['title']}\n{section['content'][:500]}...\n"
-        
-        return formatted
+            cached = self._find_cached(topic)
+            if cached:
+                return self._select_fields(self._stale_result(cached), self.FETCH_FIELDS, fields)
+            return self._upstream_error('Error fetching Wikipedia content', e)
+
+    @staticmethod
+    def _save_links(title, targets):
+        """Replace the stored outgoing links of an article (committed by the caller)"""
+        WikipediaLink.query.filter_by(source_title=title).delete()
+        db.session.add_all(
+            WikipediaLink(source_title=title, target_title=target, position=position)
+            for position, target in enumerate(targets)
+        )
+
+    @staticmethod
+    def get_linked_titles(title, limit=None):
+        """Titles an article links to, from the stored link graph (empty if not stored)"""
+        query = db.session.query(WikipediaLink.target_title).filter_by(
+            source_title=title
+        ).order_by(WikipediaLink.position)
+        if limit is not None:
+            query = query.limit(limit)
+        return [row[0] for row in query]
+
+    @staticmethod
+    def _select_fields(result, selectable, fields):
+        """Drop the selectable fields of a result that were not requested"""
+        if fields is None:
+            return result
+        return {key: value for key, value in result.items() if key not in selectable or key in fields}
+
+    @staticmethod
+    def _find_cached(topic, fields=None):
+        """Latest cached copy of a topic (or the article it is an alias of)"""
+        try:
+            titles = {topic, WikipediaManager.resolve_alias(topic) or topic}
+            return WikipediaContent.query.options(load_fields(WikipediaContent, fields)).filter(
+                (WikipediaContent.topic_name == topic) | WikipediaContent.title.in_(titles)
+            ).order_by(WikipediaContent.fetched_at.desc()).first()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _stale_result(cached):
+        """Fetch result built from a cached copy instead of upstream"""
+        data = cached.to_dict()
+        return {
+            'success': True,
+            'title': data['title'],
+            'url': data['url'],
+            'content': data['content'],
+            'summary': data['summary'] or "",
+            'categories': data['categories'],
+            'references': data['references'],
+            'full_text': data['content'],
+            'stale': True,
+            'fetched_at': data['fetched_at']
+        }
+
+    @staticmethod
+    def _upstream_error(message, error):
+        result = {
+            'success': False,
+            'message': f'{message}: {str(error)}'
+        }
+        if isinstance(error, CircuitOpenError):
+            result['upstream_unavailable'] = True
+            result['retry_after'] = error.retry_after
+        elif isinstance(error, DeadlineExceeded):
+            result['deadline_exceeded'] = True
+        return result
     
     @staticmethod
     def get_cached_content(topic):
         """Get cached Wikipedia content"""
-        cached = WikipediaContent.query.filter_by(topic_name=topic).first()
+        cached = WikipediaManager._by_topic_or_alias(
+            WikipediaContent.query.options(load_fields(WikipediaContent)), topic
+        )
         if cached:
             return cached.to_dict()
         return None
@@ -175,7 +422,7 @@ class WikipediaManager:
     @staticmethod
     def search_cache(query):
         """Search cached Wikipedia content"""
-        results = WikipediaContent.query.filter(
+        results = WikipediaContent.query.options(load_fields(WikipediaContent)).filter(
             WikipediaContent.title.ilike(f'%{query}%')
         ).all()
         return [result.to_dict() for result in results]
@@ -183,5 +430,130 @@ class WikipediaManager:
     @staticmethod
     def get_all_cached():
         """Get all cached Wikipedia content"""
-        cached = WikipediaContent.query.order_by(WikipediaContent.fetched_at.desc()).all()
+        cached = WikipediaContent.query.options(load_fields(WikipediaContent)).order_by(
+            WikipediaContent.fetched_at.desc()
+        ).all()
         return [item.to_dict() for item in cached]
+
+    @staticmethod
+    def _by_topic_or_alias(query, topic):
+        """Row cached under a topic name, else the newest copy of the article the topic is an alias of"""
+        cached = query.filter_by(topic_name=topic).first()
+        if cached is None:
+            title = WikipediaManager.resolve_alias(topic)
+            if title is not None:
+                cached = query.filter_by(title=title).order_by(WikipediaContent.fetched_at.desc()).first()
+        return cached
+
+    @staticmethod
+    def get_related(topic, limit=10):
+        """Cached articles most similar to a cached topic: (title, [(title, score)]), or None"""
+        cached = WikipediaManager._find_cached(topic, fields=('title',))
+        if cached is None:
+            return None
+        related = related_index.related(cached.title, limit)
+        if related is None:
+            return None
+        return cached.title, related
+
+    @staticmethod
+    def _latest_with_sections(title):
+        """Id of the newest cached copy of an article that has stored sections"""
+        titles = {title, WikipediaManager.resolve_alias(title) or title}
+        row = db.session.query(WikipediaContent.id).filter(
+            WikipediaContent.title.in_(titles) | (WikipediaContent.topic_name == title),
+            WikipediaContent.sections.any()
+        ).order_by(WikipediaContent.fetched_at.desc()).first()
+        return row[0] if row else None
+
+    @staticmethod
+    def get_section_index(title):
+        """Table of contents of a cached article, without section bodies"""
+        content_id = WikipediaManager._latest_with_sections(title)
+        if content_id is None:
+            return None
+        sections = WikipediaSection.query.options(
+            load_only(WikipediaSection.position, WikipediaSection.title, WikipediaSection.level,
+                      WikipediaSection.offset, WikipediaSection.length)
+        ).filter_by(content_id=content_id).order_by(WikipediaSection.position).all()
+        return content_id, [section.to_dict(include_text=False) for section in sections]
+
+    @staticmethod
+    def get_section(title, position):
+        """One section of a cached article (None if the article or section isn't cached)"""
+        content_id = WikipediaManager._latest_with_sections(title)
+        if content_id is None:
+            return None
+        section = WikipediaSection.query.filter_by(content_id=content_id, position=position).first()
+        return section.to_dict() if section else None
+
+    @staticmethod
+    def _payload_query(fields=None):
+        """Query that only loads the columns needed to splice cached payloads (or to serialize ``fields``)"""
+        if fields is not None:
+            return WikipediaContent.query.options(load_fields(WikipediaContent, fields))
+        return WikipediaContent.query.options(
+            load_only(WikipediaContent.id, WikipediaContent.payload)
+        )
+
+    @staticmethod
+    def _row_json(item, fields=None):
+        return item.to_json() if fields is None else dumps(item.to_dict(fields))
+
+    @staticmethod
+    def get_cached_content_json(topic, fields=None):
+        """Get cached Wikipedia content as a pre-serialized JSON string"""
+        cached = WikipediaManager._by_topic_or_alias(WikipediaManager._payload_query(fields), topic)
+        if cached:
+            return WikipediaManager._row_json(cached, fields)
+        return None
+
+    @staticmethod
+    def search_cache_json(query, fields=None):
+        """Search cached Wikipedia content, returning (count, JSON array string)"""
+        results = WikipediaManager._payload_query(fields).filter(
+            WikipediaContent.title.ilike(f'%{query}%')
+        ).all()
+        return len(results), json_list(WikipediaManager._row_json(result, fields) for result in results)
+
+    @staticmethod
+    def get_all_cached_json(fields=None):
+        """Get all cached Wikipedia content, returning (count, JSON array string)"""
+        cached = WikipediaManager._payload_query(fields).order_by(
+            WikipediaContent.fetched_at.desc()
+        ).all()
+        return len(cached), json_list(WikipediaManager._row_json(item, fields) for item in cached)
+
+    @staticmethod
+    def vector_search_cache_json(query, fields=None, limit=20):
+        """Cached content ranked by vector similarity to the query, returning (count, JSON array string)"""
+        ranked = vector_index.search(query, limit)
+        rows = {
+            item.id: item for item in WikipediaManager._payload_query(fields).filter(
+                WikipediaContent.id.in_([row_id for row_id, _ in ranked])
+            )
+        } if ranked else {}
+        documents = []
+        for row_id, score in ranked:
+            if row_id in rows:
+                document = WikipediaManager._row_json(rows[row_id], fields)
+                separator = ',' if len(document) > 2 else ''
+                documents.append('{"score":' + str(score) + separator + document[1:])
+        return len(documents), json_list(documents)
+
+    @staticmethod
+    def iter_cached_json(query=None, fields=None, batch_size=500):
+        """Yield cached Wikipedia content as one JSON document per row.
+
+        Rows are read from the database ``batch_size`` at a time and
+        released once serialized, so memory stays flat however many rows
+        match. Filtering and ordering match ``search_cache_json`` and
+        ``get_all_cached_json``.
+        """
+        results = WikipediaManager._payload_query(fields)
+        if query:
+            results = results.filter(WikipediaContent.title.ilike(f'%{query}%'))
+        else:
+            results = results.order_by(WikipediaContent.fetched_at.desc())
+        for item in results.yield_per(batch_size):
+            yield WikipediaManager._row_json(item, fields)